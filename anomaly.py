@@ -0,0 +1,162 @@
+"""
+Anomaly scoring for fuzz responses
+Learns what benign requests to each (endpoint, field) look like - status,
+body length, word count, latency - and scores fuzz responses against that
+baseline in batches, keeping only a small feature vector per response
+"""
+
+import math
+
+
+# Feature vector layout: (status, body length, word count, latency in seconds)
+FEATURES = ('status', 'length', 'words', 'latency')
+BENIGN_VALUES = ("test", "hello", "john.doe@example.com", "Benign value 1234",
+                 "abcdefghijklmnopqrstuvwxyz0123456789")
+DEFAULT_BASELINE_ROUNDS = 3     # times each benign value is sent per field
+DEFAULT_THRESHOLD = 4.0         # z-score beyond which a numeric feature is anomalous
+DEFAULT_BATCH_SIZE = 256        # responses scored together per (endpoint, field)
+
+# Smallest spread each numeric feature is measured against, absolute and relative to
+# its mean, so a baseline of identical responses doesn't flag every byte of reflection
+MIN_SPREAD = (16, 2, 0.05)          # bytes, words, seconds
+MIN_RELATIVE_SPREAD = (0.05, 0.05, 0.25)
+
+
+def _load_numpy():
+    """numpy if it's installed, else None (scoring falls back to plain Python)"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def response_features(status, body, latency):
+    """Compact feature vector for one response; the body itself isn't kept"""
+    return (status, len(body), len(body.split()), latency)
+
+
+class Baseline:
+    """
+    What benign responses for one (endpoint, field) look like
+    Statuses are categorical (any status never seen in the baseline is
+    anomalous); length, words and latency get a mean and a floored spread.
+    """
+
+    __slots__ = ('statuses', 'mean', 'spread', 'samples')
+
+    def __init__(self, vectors):
+        self.samples = len(vectors)
+        self.statuses = frozenset(vector[0] for vector in vectors)
+        self.mean = []
+        self.spread = []
+        for i in range(1, len(FEATURES)):
+            values = [vector[i] for vector in vectors]
+            mean = sum(values) / len(values)
+            std = math.sqrt(sum((value - mean) ** 2 for value in values) / len(values))
+            self.mean.append(mean)
+            self.spread.append(max(std, MIN_SPREAD[i - 1], MIN_RELATIVE_SPREAD[i - 1] * abs(mean)))
+
+    def describe(self, vector, scores):
+        """Why `vector` stands out, for the log"""
+        reasons = []
+        if vector[0] not in self.statuses:
+            reasons.append(f"status {vector[0]} (baseline {', '.join(map(str, sorted(self.statuses)))})")
+        for i, score in enumerate(scores, 1):
+            if score > 0:
+                reasons.append(f"{FEATURES[i]} {vector[i]:g} vs {self.mean[i - 1]:.4g}"
+                               f"±{self.spread[i - 1]:.2g} (z={score:.1f})")
+        return "; ".join(reasons)
+
+    def __repr__(self):
+        return (f"<Baseline {self.samples} samples, statuses {sorted(self.statuses)}, "
+                f"means {[round(m, 3) for m in self.mean]}>")
+
+
+class AnomalyScorer:
+    """
+    Batch scorer for fuzz responses
+
+    Responses are queued per (endpoint, field) as (payload, feature vector)
+    and scored `batch_size` at a time: vectorized z-scores with numpy when
+    it's available, the same arithmetic in plain Python otherwise. A
+    response is anomalous if its status never appeared in the baseline or
+    any numeric feature is more than `threshold` spreads from the mean.
+    Keys without a baseline are not scored.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, batch_size=DEFAULT_BATCH_SIZE, use_numpy=None):
+        self.threshold = threshold
+        self.batch_size = max(1, batch_size)
+        self.numpy = _load_numpy() if use_numpy is not False else None
+        if use_numpy and self.numpy is None:
+            raise ImportError("numpy is not installed")
+        self.baselines = {}     # key -> Baseline
+        self._pending = {}      # key -> [(payload, vector)]
+        self.stats = {'scored': 0, 'anomalies': 0}
+
+    def learn(self, key, vectors):
+        """Set the baseline for `key` from benign response vectors (ignored if empty)"""
+        if vectors:
+            self.baselines[key] = Baseline(vectors)
+
+    def add(self, key, payload, vector):
+        """
+        Queue one response for scoring
+        Returns: [(payload, vector, reason)] anomalies if this filled a batch, else []
+        """
+        if key not in self.baselines:
+            return []
+        pending = self._pending.setdefault(key, [])
+        pending.append((payload, vector))
+        if len(pending) < self.batch_size:
+            return []
+        return self.flush(key)
+
+    def flush(self, key=None):
+        """Score what's queued for `key` (or every key); returns anomalies like add()"""
+        keys = [key] if key is not None else list(self._pending)
+        found = []
+        for key in keys:
+            batch = self._pending.pop(key, None)
+            if batch:
+                found.extend(self._score(self.baselines[key], batch))
+        return found
+
+    def _score(self, baseline, batch):
+        self.stats['scored'] += len(batch)
+        vectors = [vector for _, vector in batch]
+        if self.numpy is not None:
+            flagged = self._score_numpy(baseline, vectors)
+        else:
+            flagged = self._score_python(baseline, vectors)
+
+        found = []
+        for index, scores in flagged:
+            payload, vector = batch[index]
+            found.append((payload, vector, baseline.describe(vector, scores)))
+        self.stats['anomalies'] += len(found)
+        return found
+
+    def _score_numpy(self, baseline, vectors):
+        np = self.numpy
+        table = np.asarray(vectors, dtype=float)
+        z = np.abs(table[:, 1:] - np.asarray(baseline.mean)) / np.asarray(baseline.spread)
+        new_status = ~np.isin(table[:, 0], list(baseline.statuses))
+        over = z > self.threshold
+        rows = np.flatnonzero(new_status | over.any(axis=1))
+        return [(int(row), [float(s) if o else 0.0 for s, o in zip(z[row], over[row])])
+                for row in rows]
+
+    def _score_python(self, baseline, vectors):
+        flagged = []
+        threshold = self.threshold
+        pairs = list(zip(baseline.mean, baseline.spread))
+        for index, vector in enumerate(vectors):
+            scores = []
+            for value, (mean, spread) in zip(vector[1:], pairs):
+                score = abs(value - mean) / spread
+                scores.append(score if score > threshold else 0.0)
+            if vector[0] not in baseline.statuses or any(scores):
+                flagged.append((index, scores))
+        return flagged
@@ -0,0 +1,118 @@
+"""
+Banner grabbing for open ports
+Reads a strictly bounded greeting from a socket the scan has just
+connected (or, for services that wait for the client, the reply to a
+generic probe) and matches it against compiled service signatures
+"""
+
+import asyncio
+import re
+
+
+DEFAULT_BANNER_BYTES = 512         # most bytes read from any one port
+DEFAULT_BANNER_TIMEOUT = 1.0       # seconds; total deadline per port
+DEFAULT_BANNER_CONCURRENCY = 100   # grabs in progress at once
+PASSIVE_SHARE = 0.5                # part of the deadline spent waiting for the server to speak first
+
+# Sent to ports that stay silent; most protocols answer even garbage with something recognisable
+GENERIC_PROBE = b"GET / HTTP/1.0\r\n\r\n"
+
+# (service, pattern) - matched at the start of the banner, first match wins
+SIGNATURES = (
+    ('ssh', rb'SSH-\d'),
+    ('ftp', rb'220[ -][^\r\n]*(?i:ftp)'),
+    ('smtp', rb'220[ -][^\r\n]*(?i:smtp|mail)'),
+    ('pop3', rb'\+OK'),
+    ('imap', rb'\* (?:OK|PREAUTH)'),
+    ('mysql', rb'.{3}\x00\x0a[0-9]'),
+    ('vnc', rb'RFB \d{3}\.\d{3}\n'),
+    ('telnet', rb'\xff[\xfb-\xfe]'),
+    ('redis', rb'-(?:ERR|NOAUTH|DENIED)'),
+    ('memcache', rb'(?:ERROR|CLIENT_ERROR)\r\n'),
+    ('amqp', rb'AMQP'),
+    ('rtsp', rb'RTSP/1\.0 \d{3}'),
+    ('elasticsearch', rb'HTTP/1\.[01] \d{3}.*"cluster_name"'),
+    ('http', rb'HTTP/\d\.\d \d{3}'),
+    ('ssl', rb'\x15\x03[\x00-\x04]'),   # TLS alert in reply to the plaintext probe
+)
+# Matches that more data can still turn into a more specific signature listed above them
+# (a status line arrives before the body that shows it's Elasticsearch), so reads go on
+GENERIC_SERVICES = frozenset({'http'})
+
+# All signatures in one alternation so each banner is scanned once
+_SIGNATURE_RE = re.compile(b'|'.join(b'(?P<s%d>%s)' % (index, pattern)
+                                     for index, (_, pattern) in enumerate(SIGNATURES)), re.S)
+
+
+def match_signature(banner):
+    """Service name for a banner, or None if no signature matches"""
+    match = _SIGNATURE_RE.match(banner)
+    if match is None:
+        return None
+    return SIGNATURES[int(match.lastgroup[1:])][0]
+
+
+class BannerGrabber:
+    """
+    Identifies services on open ports from what they say
+
+    Grabs reuse the socket the scan just connected, so there is no second
+    connect pass. At most `concurrency` grabs run at once and each reads
+    no more than `max_bytes` within `timeout` seconds.
+    """
+
+    def __init__(self, concurrency=DEFAULT_BANNER_CONCURRENCY, timeout=DEFAULT_BANNER_TIMEOUT,
+                 max_bytes=DEFAULT_BANNER_BYTES):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self._slots = None
+        self._loop = None
+        self.stats = {'grabbed': 0, 'identified': 0}
+
+    async def _read(self, loop, sock, data, until):
+        while len(data) < self.max_bytes:
+            remaining = until - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                chunk = await asyncio.wait_for(loop.sock_recv(sock, self.max_bytes - len(data)),
+                                               remaining)
+            except (asyncio.TimeoutError, OSError):
+                break
+            if not chunk:
+                break
+            data += chunk
+            service = match_signature(data)
+            if service and service not in GENERIC_SERVICES:
+                break
+        return data
+
+    async def identify(self, loop, sock):
+        """
+        Read what the service on a connected socket says
+        Returns: service name from a matching signature, or None
+        """
+        if self._loop is not loop:
+            # Semaphores belong to one event loop; each scan runs its own
+            self._slots = asyncio.Semaphore(self.concurrency)
+            self._loop = loop
+
+        async with self._slots:
+            start = loop.time()
+            data = await self._read(loop, sock, b'', start + self.timeout * PASSIVE_SHARE)
+            if not data:
+                try:
+                    await asyncio.wait_for(loop.sock_sendall(sock, GENERIC_PROBE),
+                                           start + self.timeout - loop.time())
+                except (asyncio.TimeoutError, OSError):
+                    return None
+                data = await self._read(loop, sock, data, start + self.timeout)
+
+        if not data:
+            return None
+        self.stats['grabbed'] += 1
+        service = match_signature(data)
+        if service:
+            self.stats['identified'] += 1
+        return service
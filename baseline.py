@@ -0,0 +1,252 @@
+"""
+Differential rescans against a previous results file
+Loads what an earlier run found (any format save_results writes),
+decides what to rescan first and what to sample, and reports only what
+changed since then
+"""
+
+import csv
+import json
+import os
+import re
+import time
+import zlib
+
+from port_spec import OpenPorts, PortSet
+from wordlists import normalize_label
+
+
+DEFAULT_SAMPLE_RATE = 0.1   # share of never-seen labels / ports probed per run
+
+CHANGE_NEW = 'new'
+CHANGE_GONE = 'gone'
+CHANGE_CHANGED = 'changed'
+
+_TEXT_SUBDOMAIN = re.compile(r'^\s*\d+\.\s+(\S+)\s*$')
+_TEXT_TARGET = re.compile(r'^Target:\s+(\S+)\s*$')
+_TEXT_PORT = re.compile(r'^\s+Port\s+(\d+)\s+:\s+(.*?)\s*$')
+BANNERS_LABEL = 'Banner identification:'   # csv/txt summary line recording results['banners']
+
+
+class Baseline:
+    """
+    Subdomains and open ports from a previous run
+    `banners` is whether that run named services from banners (None if the
+    file doesn't say). Services are only compared with a run that named
+    them the same way; see use_banners().
+    """
+
+    def __init__(self, path, subdomains=(), ports=None, banners=None):
+        self.path = path
+        self.subdomains = list(dict.fromkeys(subdomains))
+        self.known = set(self.subdomains)
+        self.ports = ports or {}   # target -> OpenPorts
+        self.banners = banners
+        self.compare_services = True
+
+    def use_banners(self, banners):
+        """
+        Set how this run names services
+        Returns: True if services will be compared with the baseline's,
+        False if the two runs named them differently (or the baseline
+        doesn't record how), in which case only new and gone are reported
+        """
+        self.compare_services = self.banners is not None and self.banners == bool(banners)
+        return self.compare_services
+
+    def labels(self, domain):
+        """Wordlist labels of the baseline subdomains under `domain`"""
+        suffix = '.' + domain.lower()
+        return [sub[:-len(suffix)] for sub in self.subdomains if sub.lower().endswith(suffix)]
+
+    def open_ports(self, target):
+        return self.ports.get(target, OpenPorts())
+
+
+def load_baseline(path):
+    """
+    Read a results file written by save_results (json, csv, txt or ndjson)
+    The format is taken from the extension, falling back to the content.
+    Returns: Baseline
+    Raises: OSError if unreadable, ValueError if the format isn't recognised
+    """
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        text = f.read()
+
+    ext = os.path.splitext(path)[1].lower()
+    stripped = text.lstrip()
+    if ext == '.ndjson' or (ext != '.json' and stripped.startswith('{"type"')):
+        subdomains, ports, banners = _parse_ndjson(text)
+    elif ext == '.json' or stripped.startswith('{'):
+        subdomains, ports, banners = _parse_json(text)
+    elif ext == '.csv' or stripped.startswith('SUBDOMAINS FOUND'):
+        subdomains, ports, banners = _parse_csv(text)
+    elif ext == '.txt' or 'RECONNAISSANCE REPORT' in text[:200]:
+        subdomains, ports, banners = _parse_text(text)
+    else:
+        raise ValueError(f"Unrecognised results format in {path}")
+    return Baseline(path, subdomains, ports, banners)
+
+
+def _parse_json(text):
+    data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError("JSON results must be an object")
+    ports = {target: OpenPorts({int(port): service for port, service in found.items()})
+             for target, found in data.get('ports', {}).items()}
+    return data.get('subdomains', []), ports, data.get('banners')
+
+
+def _parse_ndjson(text):
+    subdomains, ports, banners = [], {}, None
+    for line in text.splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue  # torn last line of a stream that was still being written
+        if record.get('change') == CHANGE_GONE:
+            continue
+        if record.get('type') == 'subdomain':
+            subdomains.append(record['name'])
+        elif record.get('type') == 'port':
+            ports.setdefault(record['target'], OpenPorts())[int(record['port'])] = record['service']
+        elif record.get('type') == 'scan':
+            banners = record.get('banners')
+    return subdomains, ports, banners
+
+
+def _parse_csv(text):
+    subdomains, ports, banners = [], {}, None
+    section = None
+    for row in csv.reader(text.splitlines()):
+        if len(row) == 1 and row[0].isupper():
+            section = row[0]
+            continue
+        if not row or row[0] in ('Domain', 'Target'):
+            continue
+        if section == 'SUBDOMAINS FOUND':
+            subdomains.append(row[0])
+        elif section == 'OPEN PORTS' and len(row) >= 3 and row[1].isdigit():
+            ports.setdefault(row[0], OpenPorts())[int(row[1])] = row[2]
+        elif section == 'SUMMARY' and len(row) >= 2 and row[0] == BANNERS_LABEL:
+            banners = row[1] == 'yes'
+    return subdomains, ports, banners
+
+
+def _parse_text(text):
+    subdomains, ports, banners = [], {}, None
+    section = None
+    target = None
+    for line in text.splitlines():
+        if line in ('SUBDOMAINS:', 'OPEN PORTS:', 'SAME RESPONSE:', 'CHANGES:', 'SUMMARY:'):
+            section = line
+            continue
+        if section == 'SUBDOMAINS:':
+            match = _TEXT_SUBDOMAIN.match(line)
+            if match:
+                subdomains.append(match.group(1))
+        elif section == 'OPEN PORTS:':
+            match = _TEXT_TARGET.match(line)
+            if match:
+                target = match.group(1)
+                ports.setdefault(target, OpenPorts())
+                continue
+            match = _TEXT_PORT.match(line)
+            if match and target:
+                ports[target][int(match.group(1))] = match.group(2)
+        elif section == 'SUMMARY:' and line.startswith(BANNERS_LABEL):
+            banners = line[len(BANNERS_LABEL):].strip() == 'yes'
+    return subdomains, ports, banners
+
+
+def default_sample_seed():
+    """Seed that rotates daily, so repeated runs sample different slices of the space"""
+    return int(time.time() // 86400)
+
+
+def in_sample(key, rate, seed):
+    """Deterministically pick about `rate` of all keys for a given seed"""
+    if rate >= 1:
+        return True
+    return zlib.crc32(f"{seed}:{key}".encode('utf-8')) < rate * 0x100000000
+
+
+def prioritized_labels(labels, priority, rate, seed):
+    """Yield the `priority` labels first, then a sample of the remaining `labels`"""
+    priority = [label for label in map(normalize_label, priority) if label]
+    first = set(priority)
+    yield from dict.fromkeys(priority)
+    for label in labels:
+        if label not in first and in_sample(label, rate, seed):
+            yield label
+
+
+def sample_ports(target, ports, rate, seed):
+    """The sampled part of `ports` for one target"""
+    if rate >= 1:
+        return ports
+    return PortSet(port for port in ports if in_sample(f"{target}:{port}", rate, seed))
+
+
+def subdomain_change(baseline, name):
+    """Change record for a subdomain found this run, or None if it was known"""
+    if name in baseline.known:
+        return None
+    return {'type': 'subdomain', 'change': CHANGE_NEW, 'name': name}
+
+
+def port_change(baseline, target, port, service):
+    """Change record for a port found open this run, or None if nothing changed"""
+    previous = baseline.open_ports(target).get(port)
+    if previous is None:
+        return {'type': 'port', 'change': CHANGE_NEW, 'target': target, 'port': port,
+                'service': service}
+    if previous != service and baseline.compare_services:
+        return {'type': 'port', 'change': CHANGE_CHANGED, 'target': target, 'port': port,
+                'service': service, 'previous': previous}
+    return None
+
+
+def diff_results(baseline, results, rescanned_subdomains=None, rescanned_ports=None):
+    """
+    Compare this run's results with the baseline
+    A baseline entry missing from results is only reported gone if this
+    run actually rescanned it: `rescanned_subdomains` is the set of names
+    re-probed and answered (default: all baseline subdomains) and
+    `rescanned_ports` maps target -> PortSet of ports re-probed that
+    answered open or refused the connection (default: every baseline port
+    of each target in results). Timeouts and filtered ports are not
+    evidence either way.
+    Returns: list of change records (new and changed first, then gone)
+    """
+    changes = []
+    current = set(results.get('subdomains', []))
+    for name in results.get('subdomains', []):
+        change = subdomain_change(baseline, name)
+        if change:
+            changes.append(change)
+
+    ports = results.get('ports', {})
+    for target in ports:
+        for port, service in ports[target].items():
+            change = port_change(baseline, target, port, service)
+            if change:
+                changes.append(change)
+
+    if rescanned_subdomains is None:
+        rescanned_subdomains = baseline.subdomains
+    for name in baseline.subdomains:
+        if name in rescanned_subdomains and name not in current:
+            changes.append({'type': 'subdomain', 'change': CHANGE_GONE, 'name': name})
+
+    for target, previous in baseline.ports.items():
+        if rescanned_ports is None:
+            rescanned = previous if target in ports else ()
+        else:
+            rescanned = rescanned_ports.get(target, ())
+        found = ports.get(target, ())
+        for port, service in previous.items():
+            if port in rescanned and port not in found:
+                changes.append({'type': 'port', 'change': CHANGE_GONE, 'target': target,
+                                'port': port, 'previous': service})
+    return changes
@@ -0,0 +1,446 @@
+"""
+Offline benchmarks for the recon engines
+Starts local stand-ins - an HTTP server with configurable latency, drops
+and refusals, TCP ports that are open, closed or silently dropped, and a
+resolver that maps generated hostnames to loopback - then reports
+probes/second, p50/p99 probe latency and peak RSS for each engine.
+Nothing leaves the machine. The startup engine times fresh `cli.py`
+launches instead, for callers that run the tool thousands of times.
+
+    python benchmark.py
+    python benchmark.py --engines fast --port-counts 1000,65535 --json bench.json
+    python benchmark.py --engines startup --startup-runs 50
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import os
+import random
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+import recon_api
+import scheduler
+from http_client import HttpClient
+from resolver import Resolver
+
+
+ENGINES = ('enumerate', 'scan', 'fast', 'startup')
+DEFAULT_WORDLIST_SIZES = "1000,10000"
+DEFAULT_PORT_COUNTS = "1000,10000"
+DEFAULT_HIT_RATE = 0.2          # share of generated hostnames that resolve
+DEFAULT_DNS_LATENCY = 0.002     # seconds per stand-in lookup
+DEFAULT_HTTP_LATENCY = 0.005    # seconds before the stand-in answers a request
+DEFAULT_HTTP_DROP = 0.01        # share of requests never answered
+DEFAULT_HTTP_REFUSE = 0.01      # share of requests answered with a reset
+DEFAULT_OPEN_RATE = 0.01        # share of scanned ports with a listener
+DEFAULT_DROP_RATE = 0.001       # share of scanned ports that swallow SYNs
+DEFAULT_BASE_PORT = 20000       # first port of the scanned range (when it fits)
+DEFAULT_STARTUP_RUNS = 20       # launches timed per startup command
+STAND_IN_DOMAIN = 'bench.test'
+LOOPBACK = '127.0.0.1'
+
+
+# ----- stand-in servers (run in their own process) -----
+
+def _reset(writer):
+    # Close with RST, like a server refusing the request
+    sock = writer.get_extra_info('socket')
+    if sock is not None:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+    writer.close()
+
+
+async def _serve_http(reader, writer, config, rng):
+    try:
+        while True:
+            try:
+                await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                break
+            roll = rng.random()
+            if roll < config['http_refuse']:
+                _reset(writer)
+                return
+            if roll < config['http_refuse'] + config['http_drop']:
+                await reader.read()   # hold the connection until the client gives up
+                break
+            await asyncio.sleep(config['http_latency'])
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\nConnection: keep-alive\r\n\r\n")
+            await writer.drain()
+    except ConnectionError:
+        pass
+    writer.close()
+
+
+def _port_range(count):
+    """First and last port of a `count`-port scan range"""
+    base = DEFAULT_BASE_PORT if DEFAULT_BASE_PORT + count - 1 <= 65535 else 65536 - count
+    return base, base + count - 1
+
+
+def _port_roles(first, last, open_rate, drop_rate):
+    """Deterministic (open ports, dropped ports) for a scan range"""
+    rng = random.Random(first ^ last)
+    opened, dropped = [], []
+    for port in range(first, last + 1):
+        roll = rng.random()
+        if roll < open_rate:
+            opened.append(port)
+        elif roll < open_rate + drop_rate:
+            dropped.append(port)
+    return opened, dropped
+
+
+async def _close_at_once(reader, writer):
+    writer.close()
+
+
+async def _run_stand_ins(config, ready, stop):
+    rng = random.Random(1)
+    recon_api.raise_fd_limit(65536)
+    http = await asyncio.start_server(lambda r, w: _serve_http(r, w, config, rng), LOOPBACK, 0,
+                                      backlog=4096)
+    http_port = http.sockets[0].getsockname()[1]
+
+    servers, held = [http], []
+    layouts = {}
+    for count in config['port_counts']:
+        first, last = _port_range(count)
+        opened, dropped = _port_roles(first, last, config['open_rate'], config['drop_rate'])
+        bound_open, bound_dropped = [], []
+        for port in opened:
+            try:
+                servers.append(await asyncio.start_server(_close_at_once, LOOPBACK, port))
+                bound_open.append(port)
+            except OSError:
+                pass  # in use or privileged; scanned like any other port
+        for port in dropped:
+            # A full accept queue makes the kernel drop further SYNs: a "filtered" port
+            listener = socket.socket()
+            try:
+                listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                listener.bind((LOOPBACK, port))
+                listener.listen(0)
+                filler = socket.create_connection((LOOPBACK, port), timeout=1)
+            except OSError:
+                listener.close()
+                continue
+            held.extend((listener, filler))
+            bound_dropped.append(port)
+        layouts[count] = {'first': first, 'last': last, 'open': len(bound_open),
+                          'dropped': len(bound_dropped)}
+
+    ready.put({'http_port': http_port, 'layouts': layouts})
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, stop.wait)
+    for server in servers:
+        server.close()
+    for sock in held:
+        sock.close()
+
+
+def stand_in_process(config, ready, stop):
+    asyncio.run(_run_stand_ins(config, ready, stop))
+
+
+class StandInResolver:
+    """Resolves host<i>.bench.test to loopback for every `stride`-th i; nothing else resolves"""
+
+    def __init__(self, hit_rate, latency):
+        self.stride = max(1, round(1 / hit_rate)) if hit_rate > 0 else 0
+        self.latency = latency
+
+    def __call__(self, name):
+        if self.latency:
+            time.sleep(self.latency)
+        label = name[:-len(STAND_IN_DOMAIN) - 1] if name.endswith('.' + STAND_IN_DOMAIN) else ''
+        if self.stride and label.startswith('host') and label[4:].isdigit():
+            if int(label[4:]) % self.stride == 0:
+                return frozenset([LOOPBACK])
+        return frozenset()
+
+
+# ----- latency capture -----
+
+@contextlib.contextmanager
+def patched(owner, name, replacement):
+    original = getattr(owner, name)
+    setattr(owner, name, replacement)
+    try:
+        yield original
+    finally:
+        setattr(owner, name, original)
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+# ----- engine runs (each in a fresh process so peak RSS is its own) -----
+
+def bench_enumerate(size, config, stand_ins):
+    started, finished = {}, {}
+    filter_resolver = Resolver.filter
+    probe_http = HttpClient.probe
+
+    async def timed_filter(self, name, timeout=None):
+        started[name] = time.monotonic()
+        try:
+            return await filter_resolver(self, name, timeout)
+        finally:
+            finished[name] = time.monotonic()
+
+    async def timed_probe(self, host, *args, **kwargs):
+        try:
+            return await probe_http(self, host, *args, **kwargs)
+        finally:
+            finished[host] = time.monotonic()
+
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+        f.writelines(f"host{i}\n" for i in range(size))
+    try:
+        with patched(Resolver, 'filter', timed_filter), patched(HttpClient, 'probe', timed_probe):
+            start = time.monotonic()
+            recon_api.enumerate_subdomains(STAND_IN_DOMAIN, f.name, timeout=config['timeout'],
+                                            resolve_func=StandInResolver(config['hit_rate'],
+                                                                         config['dns_latency']),
+                                            http_port=stand_ins['http_port'])
+            seconds = time.monotonic() - start
+    finally:
+        os.remove(f.name)
+    latencies = [finished[name] - started[name] for name in started if name in finished]
+    return size, seconds, latencies
+
+
+def bench_scan(count, config, stand_ins):
+    layout = stand_ins['layouts'][count]
+    latencies = []
+    last = time.monotonic()
+
+    def port_done(port, service):
+        # The legacy scanner is serial, so the gap between ports is one probe
+        nonlocal last
+        now = time.monotonic()
+        latencies.append(now - last)
+        last = now
+
+    start = last = time.monotonic()
+    recon_api.scan_ports(LOOPBACK, range(layout['first'], layout['last'] + 1),
+                          timeout=config['connect_timeout'], on_port_done=port_done)
+    return count, time.monotonic() - start, latencies
+
+
+def bench_fast(count, config, stand_ins):
+    layout = stand_ins['layouts'][count]
+    latencies = []
+    connect = scheduler.connect_port
+
+    async def timed_connect(*args, **kwargs):
+        start = time.monotonic()
+        try:
+            return await connect(*args, **kwargs)
+        finally:
+            latencies.append(time.monotonic() - start)
+
+    with patched(scheduler, 'connect_port', timed_connect):
+        start = time.monotonic()
+        recon_api.scan_ports_fast(LOOPBACK, range(layout['first'], layout['last'] + 1),
+                                   timeout=config['connect_timeout'])
+        seconds = time.monotonic() - start
+    return count, seconds, latencies
+
+
+# Launched as `python <args>` (scripts are found next to this file); --help
+# paths show what importing each command costs before it does any work
+STARTUP_COMMANDS = {
+    'python': ['-c', 'pass'],   # the interpreter alone, as a floor
+    'cli': ['cli.py', '--help'],
+    'recon': ['cli.py', 'recon', '--help'],
+    'fuzz': ['cli.py', 'fuzz', '--help'],
+    'detect': ['cli.py', 'detect', '--help'],
+    'find-videos': ['cli.py', 'find-videos', '--help'],
+}
+
+
+def bench_startup(runs):
+    """Launch each startup command `runs` times; returns one result row per command"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    rows = []
+    for command, args in STARTUP_COMMANDS.items():
+        argv = [sys.executable] + [os.path.join(here, arg) if arg.endswith('.py') else arg
+                                   for arg in args]
+        latencies = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+            latencies.append(time.perf_counter() - start)
+        seconds = sum(latencies)
+        p50, p99 = percentile(latencies, 0.50), percentile(latencies, 0.99)
+        rows.append({
+            'engine': 'startup',
+            'command': command,
+            'size': runs,
+            'probes': runs,
+            'seconds': round(seconds, 3),
+            'probes_per_second': round(runs / seconds, 1),
+            'p50_ms': round(p50 * 1000, 2),
+            'p99_ms': round(p99 * 1000, 2),
+            'peak_rss_mb': None,
+        })
+    return rows
+
+
+BENCHES = {'enumerate': bench_enumerate, 'scan': bench_scan, 'fast': bench_fast}
+
+
+def run_engine(engine, size, config, stand_ins):
+    """Run one engine once with its output silenced; returns a result row"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        probes, seconds, latencies = BENCHES[engine](size, config, stand_ins)
+    p50, p99 = percentile(latencies, 0.50), percentile(latencies, 0.99)
+    return {
+        'engine': engine,
+        'size': size,
+        'probes': probes,
+        'seconds': round(seconds, 3),
+        'probes_per_second': round(probes / seconds, 1) if seconds else None,
+        'p50_ms': round(p50 * 1000, 2) if p50 is not None else None,
+        'p99_ms': round(p99 * 1000, 2) if p99 is not None else None,
+        'peak_rss_mb': round(peak_rss_mb(), 1) if peak_rss_mb() is not None else None,
+    }
+
+
+# ----- driver -----
+
+def parse_sizes(text):
+    sizes = [int(item) for item in text.split(',') if item.strip()]
+    if not sizes or any(size < 1 for size in sizes):
+        raise argparse.ArgumentTypeError(f"expected comma-separated positive counts, got '{text}'")
+    return sizes
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Offline benchmarks for the recon engines')
+    parser.add_argument('--engines', default=','.join(ENGINES),
+                    help=f'Engines to run, comma-separated from {", ".join(ENGINES)} (default: all)')
+    parser.add_argument('--wordlist-sizes', type=parse_sizes, default=parse_sizes(DEFAULT_WORDLIST_SIZES),
+                    help=f'Wordlist sizes for enumerate (default: {DEFAULT_WORDLIST_SIZES})')
+    parser.add_argument('--port-counts', type=parse_sizes, default=parse_sizes(DEFAULT_PORT_COUNTS),
+                    help=f'Port range sizes for scan/fast, up to 65535 (default: {DEFAULT_PORT_COUNTS})')
+    parser.add_argument('--hit-rate', type=float, default=DEFAULT_HIT_RATE,
+                    help=f'Share of generated hostnames that resolve (default: {DEFAULT_HIT_RATE})')
+    parser.add_argument('--dns-latency', type=float, default=DEFAULT_DNS_LATENCY,
+                    help=f'Stand-in resolver delay in seconds (default: {DEFAULT_DNS_LATENCY})')
+    parser.add_argument('--http-latency', type=float, default=DEFAULT_HTTP_LATENCY,
+                    help=f'Stand-in HTTP response delay in seconds (default: {DEFAULT_HTTP_LATENCY})')
+    parser.add_argument('--http-drop', type=float, default=DEFAULT_HTTP_DROP,
+                    help=f'Share of HTTP requests never answered (default: {DEFAULT_HTTP_DROP})')
+    parser.add_argument('--http-refuse', type=float, default=DEFAULT_HTTP_REFUSE,
+                    help=f'Share of HTTP requests reset (default: {DEFAULT_HTTP_REFUSE})')
+    parser.add_argument('--open-rate', type=float, default=DEFAULT_OPEN_RATE,
+                    help=f'Share of scanned ports that are open (default: {DEFAULT_OPEN_RATE})')
+    parser.add_argument('--drop-rate', type=float, default=DEFAULT_DROP_RATE,
+                    help=f'Share of scanned ports that drop SYNs (default: {DEFAULT_DROP_RATE})')
+    parser.add_argument('--timeout', type=float, default=1.0,
+                    help='Subdomain probe deadline in seconds (default: 1.0)')
+    parser.add_argument('--connect-timeout', type=float, default=0.5,
+                    help='Initial/maximum connect timeout in seconds (default: 0.5)')
+    parser.add_argument('--startup-runs', type=int, default=DEFAULT_STARTUP_RUNS,
+                    help=f'Launches timed per command for startup (default: {DEFAULT_STARTUP_RUNS})')
+    parser.add_argument('--json', metavar='FILE', help='Also write the result rows to FILE')
+    args = parser.parse_args()
+
+    args.engines = [engine.strip() for engine in args.engines.split(',') if engine.strip()]
+    unknown = set(args.engines) - set(ENGINES)
+    if unknown:
+        parser.error(f"unknown engine(s): {', '.join(sorted(unknown))}")
+    if max(args.port_counts) > 65535:
+        parser.error("--port-counts cannot exceed 65535")
+    if args.startup_runs < 1:
+        parser.error("--startup-runs must be at least 1")
+    return args
+
+
+def print_table(rows):
+    header = f"{'engine':<20} {'size':>7} {'seconds':>9} {'probes/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'peak MB':>8}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        cells = [row['probes_per_second'], row['p50_ms'], row['p99_ms'], row['peak_rss_mb']]
+        p_s, p50, p99, rss = ('-' if value is None else value for value in cells)
+        engine = f"{row['engine']}/{row['command']}" if 'command' in row else row['engine']
+        print(f"{engine:<20} {row['size']:>7} {row['seconds']:>9} {p_s:>10} {p50:>8} {p99:>8} {rss:>8}")
+
+
+def main():
+    args = parse_arguments()
+    config = {
+        'hit_rate': args.hit_rate, 'dns_latency': args.dns_latency,
+        'http_latency': args.http_latency, 'http_drop': args.http_drop,
+        'http_refuse': args.http_refuse, 'open_rate': args.open_rate,
+        'drop_rate': args.drop_rate, 'timeout': args.timeout,
+        'connect_timeout': args.connect_timeout, 'port_counts': args.port_counts,
+        'startup_runs': args.startup_runs,
+    }
+    rows = []
+    if 'startup' in args.engines:
+        print(f"[*] startup x {args.startup_runs}...")
+        rows.extend(bench_startup(args.startup_runs))
+
+    runs = []
+    for engine in args.engines:
+        if engine == 'startup':
+            continue
+        sizes = args.wordlist_sizes if engine == 'enumerate' else args.port_counts
+        runs.extend((engine, size) for size in sizes)
+
+    if runs:
+        # spawn, not fork: every engine starts from a clean interpreter so peak RSS is comparable
+        context = multiprocessing.get_context('spawn')
+        ready, stop = context.Queue(), context.Event()
+        servers = context.Process(target=stand_in_process, args=(config, ready, stop), daemon=True)
+        servers.start()
+        stand_ins = ready.get()
+        print(f"[*] Stand-ins up: HTTP on {LOOPBACK}:{stand_ins['http_port']}, "
+              f"{len(stand_ins['layouts'])} port layouts")
+        try:
+            for engine, size in runs:
+                print(f"[*] {engine} x {size}...")
+                with context.Pool(1) as pool:
+                    rows.append(pool.apply(run_engine, (engine, size, config, stand_ins)))
+        finally:
+            stop.set()
+            servers.join(5)
+
+    print()
+    print_table(rows)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'config': config, 'results': rows}, f, indent=2)
+        print(f"\n[*] Results saved to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+Checkpoint journal for resumable recon runs
+Progress is appended to a JSON-lines file as the run goes, so an
+interrupted run can pick up where it stopped with --resume
+"""
+
+import json
+import os
+import re
+import time
+from datetime import datetime
+
+from port_spec import PortSet, parse_port_spec, port_tiers
+
+
+DEFAULT_FLUSH_INTERVAL = 2.0  # seconds between journal flushes
+
+
+def default_checkpoint_path(args):
+    """Derive a per-run journal name from the domain/target (and shard) being scanned"""
+    name = args.domain or args.target or 'run'
+    if getattr(args, 'shard', None):
+        name += '.shard' + args.shard.replace('/', 'of')
+    name = re.sub(r'[^A-Za-z0-9._-]', '_', name)
+    return f"recon_{name}.checkpoint"
+
+
+def checkpoint_path(args):
+    """Journal path for a run: --checkpoint if given, else the derived default"""
+    return args.checkpoint or default_checkpoint_path(args)
+
+
+def run_identity(args):
+    """
+    The settings a checkpoint must match to be resumed
+    Ports are recorded as the resolved spec, so "top-100" and its expansion match.
+    """
+    baseline = getattr(args, 'baseline', None)
+    ports = getattr(args, 'ports', None)
+    return {'domain': args.domain, 'target': args.target, 'wordlist': args.wordlist,
+            'shard': getattr(args, 'shard', None), 'baseline': baseline,
+            'sample_seed': args.sample_seed if baseline else None,
+            'ports': parse_port_spec(ports).to_spec() if ports else None,
+            'banners': bool(getattr(args, 'banners', False))}
+
+
+def read_header(path):
+    """
+    Read the run record a journal was started with
+    Returns: dict, or None if the file is missing or has no header
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            record = json.loads(f.readline())
+    except (OSError, ValueError):
+        return None
+    return record if record.get('type') == 'run' else None
+
+
+class Checkpoint:
+    """
+    Append-only journal of finished work
+
+    Wordlist progress is stored as a watermark: every label before
+    `position` has been fully probed. Workers finish out of order, so
+    labels completed past the watermark are held in memory until the
+    gap closes (bounded by the number of probes in flight).
+    """
+
+    def __init__(self, path, identity, resume=False, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.position = 0
+        self.subdomains = []
+        self.timeouts = []
+        self.responses = {}    # subdomain -> (fingerprint list, probed address)
+        self.phases = set()
+        self.open_ports = {}   # target -> {port: service}
+        self.done_ports = {}   # target -> PortSet of ports already scanned
+
+        if resume:
+            self._load()
+            self.file = open(path, 'a', encoding='utf-8')
+        else:
+            self.file = open(path, 'w', encoding='utf-8')
+            self._write({'type': 'run', 'started': datetime.now().isoformat(), **identity})
+
+        self._pending = []
+        self._completed = set()      # label indexes finished past the watermark
+        self._ports_batch = {}       # target -> ({port: service}, PortSet of closed ports)
+        self._last_flush = time.monotonic()
+
+    def _load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # torn write from the crash; everything before it is good
+                kind = record.get('type')
+                if kind == 'progress':
+                    self.position = max(self.position, record['position'])
+                elif kind == 'subdomain':
+                    self.subdomains.append(record['name'])
+                    if record.get('fp'):
+                        self.responses[record['name']] = (record['fp'], record.get('address'))
+                elif kind == 'timeout':
+                    self.timeouts.append(record['name'])
+                elif kind == 'phase':
+                    self.phases.add(record['name'])
+                elif kind == 'ports':
+                    target = record['target']
+                    opened = {int(port): service for port, service in record['open'].items()}
+                    self.open_ports.setdefault(target, {}).update(opened)
+                    done = self.done_ports.setdefault(target, PortSet())
+                    done.update(opened)
+                    if record['closed']:
+                        done.update(parse_port_spec(record['closed']))
+
+    def _write(self, record):
+        self.file.write(json.dumps(record, separators=(',', ':')) + "\n")
+
+    # ----- phase 1: wordlist progress -----
+
+    def label_done(self, index):
+        """Mark the label at stream position `index` as fully probed"""
+        if index != self.position:
+            self._completed.add(index)
+            return
+        self.position += 1
+        while self.position in self._completed:
+            self._completed.remove(self.position)
+            self.position += 1
+        self._maybe_flush()
+
+    def subdomain_found(self, name, fingerprint=None, address=None):
+        record = {'type': 'subdomain', 'name': name}
+        if fingerprint is not None:
+            # Lets a resumed run regroup catch-all responses without probing again
+            record.update(fp=fingerprint, address=address)
+        self._pending.append(record)
+        self._maybe_flush()
+
+    def subdomain_timeout(self, name):
+        self._pending.append({'type': 'timeout', 'name': name})
+        self._maybe_flush()
+
+    def phase_done(self, name):
+        self.phases.add(name)
+        self._pending.append({'type': 'phase', 'name': name})
+        self.flush()
+
+    # ----- phase 2: (target, port) pairs -----
+
+    def ports_to_scan(self, target, ports):
+        """
+        Drop ports this target has already been scanned on
+        `ports` is a PortSet or a tuple of them (scan tiers), and the same shape is returned
+        """
+        done = self.done_ports.get(target)
+        if not done:
+            return ports
+        tiers = port_tiers(ports)
+        if tiers[0] is ports:
+            return ports - done
+        return tuple(tier - done for tier in tiers)
+
+    def port_done(self, target, port, service=None):
+        """Record a port that answered; service is None for ports that refused the connection"""
+        opened, closed = self._ports_batch.setdefault(target, ({}, PortSet()))
+        if service is None:
+            closed.add(port)
+        else:
+            opened[str(port)] = service
+        self._maybe_flush()
+
+    # ----- persistence -----
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write buffered records and the current watermark, then fsync"""
+        for record in self._pending:
+            self._write(record)
+        self._pending = []
+        for target, (opened, closed) in self._ports_batch.items():
+            # Closed ports are stored as a range spec ("1-79,81-442") to keep sweeps small
+            self._write({'type': 'ports', 'target': target, 'open': opened, 'closed': closed.to_spec()})
+        self._ports_batch = {}
+        self._write({'type': 'progress', 'position': self.position})
+
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        """Flush and keep the journal for a later --resume"""
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def finish(self):
+        """The run completed; the journal is no longer needed"""
+        if not self.file.closed:
+            self.file.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
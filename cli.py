@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the toolkit
+Dispatches to one subcommand and imports only that command's module, so
+a port scan never loads the fuzzer's HTTP library and `detect` never
+loads the recon engines
+
+    python cli.py recon -d example.com -t example.com
+    python cli.py fuzz
+    python cli.py detect
+    python cli.py find-videos
+"""
+
+import sys
+
+
+# command -> (module with main(argv, prog), one-line description)
+COMMANDS = {
+    'recon': ('recon_tool', 'Subdomain enumeration and port scanning'),
+    'fuzz': ('fuzzer', 'Fuzz API endpoints with the payloads in payloads.txt'),
+    'detect': ('detector', 'Watch local connections for reverse shells'),
+    'find-videos': ('find_videos', 'List every video file on a drive'),
+}
+# Third-party packages a command may import -> how to get them
+INSTALL_HINTS = {
+    'psutil': 'pip install psutil',
+}
+
+
+def usage(prog):
+    width = max(map(len, COMMANDS))
+    lines = [f"usage: {prog} <command> [options]", "", "commands:"]
+    lines += [f"  {name:<{width}}  {description}" for name, (_, description) in COMMANDS.items()]
+    lines += ["", f"Run '{prog} <command> --help' for a command's options."]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Run a subcommand; returns the exit code"""
+    argv = sys.argv[1:] if argv is None else argv
+    prog = sys.argv[0].replace('\\', '/').rpartition('/')[2] or 'cli.py'
+
+    if not argv or argv[0] in ('-h', '--help'):
+        print(usage(prog))
+        return 0 if argv else 2
+    command, rest = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"{prog}: unknown command '{command}' (choose from {', '.join(COMMANDS)})",
+              file=sys.stderr)
+        return 2
+
+    # Deferred so only the chosen command's imports are paid for
+    import importlib
+    try:
+        module = importlib.import_module(COMMANDS[command][0])
+        return module.main(rest, prog=f"{prog} {command}") or 0
+    except ModuleNotFoundError as e:
+        if e.name not in INSTALL_HINTS:
+            raise
+        print(f"[!] '{command}' needs the {e.name} package: {INSTALL_HINTS[e.name]}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
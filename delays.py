@@ -0,0 +1,121 @@
+"""
+Time-based payload detection
+Recognizes payloads that ask the backend to sleep (SQL SLEEP / WAITFOR
+DELAY, shell sleep, MongoDB $where sleep), and confirms a slow response
+by re-sending the payload with other sleep values: a real injection
+slows down in step with the requested delay, a loaded server doesn't
+"""
+
+import re
+
+from timing import K
+
+
+DEFAULT_CONFIRM_DELAYS = (2, 4)  # seconds re-tested to confirm a suspected delay
+DELAY_TOLERANCE = 0.8            # fraction of a requested delay that must show up as extra latency
+
+
+def _seconds(text):
+    return float(text)
+
+
+def _clock(text):
+    hours, minutes, seconds = text.split(':')
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def _format_clock(seconds):
+    return f"{int(seconds // 3600)}:{int(seconds % 3600 // 60)}:{seconds % 60:g}"
+
+
+# (pattern with the delay literal as group 1, literal -> seconds, seconds -> literal),
+# most specific first: MongoDB's sleep() takes milliseconds, SQL's takes seconds
+DELAY_SYNTAXES = [
+    (re.compile(r'\$where\b.*?\bsleep\(\s*(\d+)\s*\)', re.I),
+     lambda text: int(text) / 1000, lambda seconds: f"{int(seconds * 1000)}"),
+    (re.compile(r"\bwaitfor\s+delay\s+'(\d+:\d+:\d+(?:\.\d+)?)'", re.I),
+     _clock, _format_clock),
+    (re.compile(r'\b(?:pg_)?sleep\(\s*(\d+(?:\.\d+)?)\s*\)', re.I),
+     _seconds, lambda seconds: f"{seconds:g}"),
+    (re.compile(r'\bsleep\s+(\d+(?:\.\d+)?)', re.I),
+     _seconds, lambda seconds: f"{seconds:g}"),
+]
+
+
+class DelayPayload:
+    """A payload that requests a delay of `seconds`, and can be rewritten to ask for another"""
+
+    __slots__ = ('payload', 'seconds', '_start', '_end', '_format')
+
+    def __init__(self, payload, seconds, start, end, format_delay):
+        self.payload = payload
+        self.seconds = seconds
+        self._start = start
+        self._end = end
+        self._format = format_delay
+
+    def with_delay(self, seconds):
+        """The same payload asking for `seconds` instead"""
+        return self.payload[:self._start] + self._format(seconds) + self.payload[self._end:]
+
+    def __repr__(self):
+        return f"<DelayPayload {self.seconds:g}s {self.payload!r}>"
+
+
+def parse_delay(payload):
+    """DelayPayload for a time-based payload, or None if it doesn't request a delay"""
+    for pattern, parse, format_delay in DELAY_SYNTAXES:
+        match = pattern.search(payload)
+        if match:
+            seconds = parse(match.group(1))
+            if seconds <= 0:
+                return None
+            return DelayPayload(payload, seconds, match.start(1), match.end(1), format_delay)
+    return None
+
+
+def normal_latency(reference):
+    """
+    Upper bound of ordinary latency from an RttEstimator fed with the
+    endpoint's other responses (SRTT + K * RTTVAR), so it tracks whatever
+    load the fuzzer itself is putting on the server; 0 before any samples
+    """
+    if reference is None or reference.srtt is None:
+        return 0.0
+    return reference.srtt + K * reference.rttvar
+
+
+def looks_delayed(latency, seconds, reference=None):
+    """Did a response take the requested delay longer than the endpoint normally does?"""
+    return latency - normal_latency(reference) >= DELAY_TOLERANCE * seconds
+
+
+async def confirm_delay(send, probe, delays=DEFAULT_CONFIRM_DELAYS):
+    """
+    Re-test a suspected delay at other sleep values
+
+    `send(payload, seconds)` must return an awaitable of the latency of
+    sending `payload`, which requests a delay of `seconds`, or of None if
+    it timed out (a capped latency proves nothing, so that ends the
+    re-test unconfirmed). Each delayed
+    request is paired with a zero-delay control sent just before it, and
+    only the difference counts, so latency that comes from load rather
+    than the payload cancels out. Confirmed if every delay adds at least
+    DELAY_TOLERANCE of itself and longer delays add more.
+    Returns: (confirmed, [(requested seconds, extra seconds measured or None)])
+    """
+    measured = []
+    for seconds in delays:
+        control = await send(probe.with_delay(0), 0)
+        latency = await send(probe.with_delay(seconds), seconds) if control is not None else None
+        if latency is None:
+            measured.append((seconds, None))
+            return False, measured
+        measured.append((seconds, latency - control))
+
+    confirmed = all(extra >= DELAY_TOLERANCE * seconds for seconds, extra in measured)
+    ordered = sorted(measured)
+    confirmed = confirmed and all(earlier[1] < later[1]
+                                  for earlier, later in zip(ordered, ordered[1:])
+                                  if earlier[0] < later[0])
+    return confirmed, measured
@@ -1,4 +1,5 @@
-import psutil
+import argparse
+import sys
 import time
 from datetime import datetime
 import socket
@@ -38,6 +39,8 @@ def get_ip_info(ip):
         return "Unknown"
 
 def detect_suspicious_connections():
+    import psutil  # imported here so `--help` and the cli dispatcher stay fast
+    
     print("🔍 Reverse Shell Detector Started")
     print("Monitoring network connections...\n")
     
@@ -127,9 +130,17 @@ def educational_info():
     print("="*60)
     print()
 
-if __name__ == "__main__":
+def main(argv=None, prog=None):
+    """Entry point for `python detector.py` and `cli.py detect`; returns the exit code"""
+    parser = argparse.ArgumentParser(prog=prog, description='Watch local network connections '
+                                                            'for signs of reverse shells')
+    parser.parse_args(argv)
     educational_info()
     try:
         detect_suspicious_connections()
     except KeyboardInterrupt:
-        print("\n\n🛑 Detector stopped. Stay secure!")
\ No newline at end of file
+        print("\n\n🛑 Detector stopped. Stay secure!")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
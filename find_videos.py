@@ -1,4 +1,6 @@
+import argparse
 import os
+import sys
 import json
 import time
 from datetime import datetime
@@ -191,7 +193,11 @@ def find_all_videos():
     
     return all_videos
 
-if __name__ == "__main__":
+def main(argv=None, prog=None):
+    """Entry point for `python find_videos.py` and `cli.py find-videos`; returns the exit code"""
+    parser = argparse.ArgumentParser(prog=prog, description=f'List every video file on {DRIVE_TO_SEARCH} '
+                                                            f'and save them to {OUTPUT_FILE}')
+    parser.parse_args(argv)
     try:
         print("Starting deep scan of entire drive...")
         print("This may take 10-30 minutes depending on drive size.")
@@ -202,9 +208,14 @@ if __name__ == "__main__":
         
         print("\n✨ Done! Check your Desktop for the results files.")
         input("Press Enter to exit...")
+        return 0
         
     except Exception as e:
         print(f"\n💥 ERROR: {e}")
         import traceback
         traceback.print_exc()
-        input("Press Enter to exit...")
\ No newline at end of file
+        input("Press Enter to exit...")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,176 @@
+"""
+HTTP response fingerprinting
+Reduces a probe response to an exact hash and a 64-bit SimHash over its
+status, key headers and first body bytes, and clusters near-identical
+responses so catch-all vhosts count once instead of thousands of times
+"""
+
+import hashlib
+import re
+
+
+# Headers a catch-all tends to repeat verbatim, and ones it repeats up to the hostname
+EXACT_HEADERS = ('server', 'content-type', 'content-length', 'etag', 'last-modified',
+                 'x-powered-by', 'www-authenticate')
+HOST_HEADERS = ('location',)
+DEFAULT_MAX_DISTANCE = 3    # SimHash bits two responses may differ in and still cluster
+BANDS = 4                   # max distance < BANDS, so near neighbours share a whole band
+BAND_BITS = 64 // BANDS
+
+# Run-specific noise in bodies and redirect targets: request ids, timestamps, tokens
+_VOLATILE = re.compile(r'[0-9a-f]{8,}|\d+', re.I)
+_TOKEN = re.compile(r'[a-z_][a-z0-9_.-]*|\{host\}|#', re.I)
+_COOKIE_NAME = re.compile(r'(?:^|,)\s*([^=,;\s]+)=')
+
+
+def _hash64(token):
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def normalize(text, host):
+    """Lowercase, replace the probed hostname and volatile numbers with placeholders"""
+    text = text.lower()
+    if host:
+        text = text.replace(host.lower(), '{host}')
+    return _VOLATILE.sub('#', text)
+
+
+def features(status, headers, body, host=None):
+    """The normalized (token, weight) features a response is fingerprinted on"""
+    found = [(f"status:{status}", 4)]
+    for name in EXACT_HEADERS:
+        value = headers.get(name)
+        if value is not None:
+            found.append((f"{name}:{value.strip().lower()}", 2))
+    for name in HOST_HEADERS:
+        value = headers.get(name)
+        if value is not None:
+            found.append((f"{name}:{normalize(value, host)}", 2))
+    cookie = headers.get('set-cookie')
+    if cookie is not None:
+        # Cookie values are per-session; the names are what a given backend always sets
+        names = sorted(set(_COOKIE_NAME.findall(cookie)))
+        found.append((f"set-cookie:{','.join(names)}", 2))
+    if body:
+        text = normalize(body.decode('latin-1'), host)
+        found.extend((f"body:{token}", 1) for token in _TOKEN.findall(text))
+    return found
+
+
+def simhash(weighted):
+    """64-bit SimHash of (token, weight) pairs"""
+    totals = [0] * 64
+    for token, weight in weighted:
+        value = _hash64(token)
+        for bit in range(64):
+            totals[bit] += weight if value >> bit & 1 else -weight
+    return sum(1 << bit for bit, total in enumerate(totals) if total > 0)
+
+
+class Fingerprint:
+    """Exact hash and SimHash of one response"""
+
+    __slots__ = ('status', 'digest', 'simhash')
+
+    def __init__(self, status, digest, simhash):
+        self.status = status
+        self.digest = digest
+        self.simhash = simhash
+
+    def distance(self, other):
+        return bin(self.simhash ^ other.simhash).count('1')
+
+    def to_list(self):
+        return [self.status, self.digest, self.simhash]
+
+    @classmethod
+    def from_list(cls, values):
+        return cls(*values)
+
+    def __repr__(self):
+        return f"<Fingerprint {self.status} {self.digest[:12]} {self.simhash:016x}>"
+
+
+def fingerprint(response, host=None):
+    """
+    Fingerprint an HttpResponse (or anything with status/headers/body)
+    Occurrences of `host` are masked so catch-alls that echo the name still match.
+    """
+    weighted = features(response.status, response.headers, response.body, host)
+    digest = hashlib.blake2b('\n'.join(token for token, _ in weighted).encode('utf-8'),
+                             digest_size=16).hexdigest()
+    return Fingerprint(response.status, digest, simhash(weighted))
+
+
+class ResponseClusters:
+    """
+    Groups names whose responses are identical or near-identical
+
+    Names are only grouped within a scope (the address that was probed):
+    the same page served from the same address is a catch-all vhost,
+    while unrelated hosts that happen to answer alike, e.g. with the same
+    redirect to HTTPS, still get scanned separately.
+
+    Exact matches are a dict lookup. Near matches are found through
+    SimHash bands: any two fingerprints within `max_distance` < BANDS bits
+    agree on at least one 16-bit band, so only clusters sharing a band
+    (plus scope and status code) are compared.
+    """
+
+    def __init__(self, max_distance=DEFAULT_MAX_DISTANCE):
+        if not 0 <= max_distance < BANDS:
+            raise ValueError(f"max_distance must be between 0 and {BANDS - 1}")
+        self.max_distance = max_distance
+        self.clusters = []          # [representative fingerprint, [names]]
+        self._exact = {}            # (scope, digest) -> cluster index
+        self._bands = {}            # (scope, status, band number, band value) -> [cluster index]
+        self.stats = {'responses': 0, 'exact': 0, 'similar': 0}
+
+    def _band_keys(self, fp, scope):
+        mask = (1 << BAND_BITS) - 1
+        return [(scope, fp.status, band, fp.simhash >> (band * BAND_BITS) & mask)
+                for band in range(BANDS)]
+
+    def add(self, name, fp, scope=None):
+        """
+        File a name under its response's cluster
+        A name without a fingerprint (None) always gets a cluster of its own.
+        Returns: the cluster's representative name (`name` itself if it starts a new cluster)
+        """
+        self.stats['responses'] += 1
+        if fp is None:
+            self.clusters.append([None, [name]])
+            return name
+
+        index = self._exact.get((scope, fp.digest))
+        if index is not None:
+            self.stats['exact'] += 1
+        else:
+            keys = self._band_keys(fp, scope)
+            candidates = {i for key in keys for i in self._bands.get(key, ())}
+            for candidate in sorted(candidates):
+                if self.clusters[candidate][0].distance(fp) <= self.max_distance:
+                    index = candidate
+                    self.stats['similar'] += 1
+                    break
+            if index is None:
+                index = len(self.clusters)
+                self.clusters.append([fp, []])
+                for key in keys:
+                    self._bands.setdefault(key, []).append(index)
+            self._exact[(scope, fp.digest)] = index
+
+        members = self.clusters[index][1]
+        members.append(name)
+        return members[0]
+
+    def representatives(self):
+        """First name of every cluster, in discovery order"""
+        return [members[0] for _, members in self.clusters]
+
+    def groups(self):
+        """{representative: [other members]} for clusters with more than one name"""
+        return {members[0]: members[1:] for _, members in self.clusters if len(members) > 1}
+
+    def __len__(self):
+        return len(self.clusters)
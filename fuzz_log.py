@@ -0,0 +1,149 @@
+"""
+Structured fuzz event log
+Fuzz events go through a bounded queue to a background thread that
+serializes them to JSONL in batches, so the request path never touches
+the disk, and a summary index of findings by endpoint, field and type is
+written next to the log when it closes
+"""
+
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+
+
+DEFAULT_QUEUE_SIZE = 10000      # events that may wait for the writer before callers block
+DEFAULT_BATCH_SIZE = 512        # events per write
+DEFAULT_FLUSH_INTERVAL = 0.5    # seconds an event may wait before it is written
+DEFAULT_FSYNC_INTERVAL = 5.0    # seconds between fsyncs
+
+_STOP = object()
+
+
+def index_path(path):
+    """Where the summary index for the event log at `path` goes"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.index.json" if ext == '.jsonl' else f"{path}.index.json"
+
+
+class FuzzEventLog:
+    """
+    JSONL log of fuzz events written by a background thread
+
+    write() only puts the event on a queue of `queue_size`; when the
+    writer falls that far behind, callers block until it catches up
+    rather than dropping events. The writer serializes events and writes
+    them `batch_size` at a time, or once the oldest has waited
+    `flush_interval` seconds, each batch as one O_APPEND write so it is
+    in the OS's hands (and survives the process dying) straight away.
+    The file is fsynced every `fsync_interval` seconds and on close.
+
+    'finding' events are also indexed: close() writes {endpoint: {field:
+    {finding: {'count', 'lines'}}}} to index_path(path), with the 1-based
+    line numbers of the events in the log.
+    """
+
+    def __init__(self, path, queue_size=DEFAULT_QUEUE_SIZE, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, fsync_interval=DEFAULT_FSYNC_INTERVAL):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND | os.O_TRUNC, 0o644)
+        self.index = {}
+        self.error = None
+        self.stats = {'events': 0, 'writes': 0, 'fsyncs': 0}
+
+        self._queue = queue.Queue(queue_size)
+        self._lines = 0
+        self._last_fsync = time.monotonic()
+        self._dirty = False
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name='fuzz-log', daemon=True)
+        self._writer.start()
+        # A crash that unwinds the interpreter still gets the queue written out
+        atexit.register(self.close)
+
+    def write(self, record):
+        """Queue one event (a JSON-serialisable dict); blocks only if the queue is full"""
+        if self.error:
+            raise self.error
+        self._queue.put(record)
+
+    def finding(self, endpoint, field, finding, payload, detail):
+        self.write({'type': 'finding', 'time': time.time(), 'endpoint': endpoint, 'field': field,
+                    'finding': finding, 'payload': payload, 'detail': detail})
+
+    def _run(self):
+        batch = []
+        oldest = None
+        while True:
+            wait = None if oldest is None else max(0.0, oldest + self.flush_interval - time.monotonic())
+            try:
+                record = self._queue.get(timeout=wait)
+            except queue.Empty:
+                record = None
+            stopping = record is _STOP
+            if record is not None and not stopping:
+                batch.append(record)
+                if oldest is None:
+                    oldest = time.monotonic()
+            if batch and (stopping or len(batch) >= self.batch_size
+                          or time.monotonic() - oldest >= self.flush_interval):
+                self._write_batch(batch)
+                batch = []
+                oldest = None
+            if stopping:
+                return
+
+    def _write_batch(self, batch):
+        lines = []
+        for record in batch:
+            self._lines += 1
+            lines.append(json.dumps(record, separators=(',', ':'), default=str))
+            if record.get('type') == 'finding':
+                entry = (self.index.setdefault(record['endpoint'], {})
+                         .setdefault(record['field'], {})
+                         .setdefault(record['finding'], {'count': 0, 'lines': []}))
+                entry['count'] += 1
+                entry['lines'].append(self._lines)
+        self.stats['events'] += len(batch)
+        if self.error:
+            return
+        try:
+            os.write(self.fd, ('\n'.join(lines) + '\n').encode('utf-8'))
+            self.stats['writes'] += 1
+            self._dirty = True
+            if time.monotonic() - self._last_fsync >= self.fsync_interval:
+                self._fsync()
+        except OSError as e:
+            # Keep draining so callers never block on a dead writer; write() re-raises this
+            self.error = e
+
+    def _fsync(self):
+        os.fsync(self.fd)
+        self._last_fsync = time.monotonic()
+        self._dirty = False
+        self.stats['fsyncs'] += 1
+
+    def close(self):
+        """
+        Write and fsync everything queued, close the log and write the summary index
+        Returns: the index path
+        """
+        if self._closed:
+            return index_path(self.path)
+        self._closed = True
+        atexit.unregister(self.close)
+        self._queue.put(_STOP)
+        self._writer.join()
+        if self._dirty and not self.error:
+            self._fsync()
+        os.close(self.fd)
+
+        summary = {'log': self.path, 'events': self._lines, 'findings': self.index}
+        with open(index_path(self.path), 'w') as f:
+            json.dump(summary, f, indent=2)
+        return index_path(self.path)
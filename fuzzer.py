@@ -1,6 +1,20 @@
-import requests
+import argparse
+import asyncio
+import json
+import re
+import sys
 import time
 from datetime import datetime
+from json.encoder import encode_basestring_ascii
+
+from anomaly import (AnomalyScorer, BENIGN_VALUES, DEFAULT_BASELINE_ROUNDS, DEFAULT_THRESHOLD,
+                     response_features)
+from delays import DEFAULT_CONFIRM_DELAYS, confirm_delay, looks_delayed, parse_delay
+from fuzz_log import FuzzEventLog
+from http_client import HttpClient
+from payloads import PayloadStream, parse_mutations
+from ratelimit import RateLimiter
+from timing import RttEstimator
 
 ENDPOINTS = {
     "login": {
@@ -8,86 +22,380 @@ ENDPOINTS = {
         "fields": ["email", "password"]
     },
     "register": {
-        "url": "http://localhost:3000/api/auth/register", 
+        "url": "http://localhost:3000/api/auth/register",
         "fields": ["email", "password", "name"]
     }
 }
+# An endpoint entry may also set "concurrency" to override --concurrency for it
+
+# Valid values for the fields that aren't being fuzzed (others are left out)
+FIELD_DEFAULTS = {
+    "email": "test@test.com",
+    "password": "TestPass123",
+    "name": "Test User",
+}
+SLOT = "\x00payload\x00"   # placeholder for the fuzzed value while a template is compiled
+
+DEFAULT_CONCURRENCY = 10     # requests in flight per endpoint
+DEFAULT_TIMEOUT = 3          # seconds per request
+DEFAULT_MAX_BODY = 65536     # response bytes read and checked per request
+THROTTLED_STATUSES = (429, 503)  # answers that mean "slow down"
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+# Matched against raw body bytes, so responses are never lowercased or decoded just to check them
+_ERROR_WORD = re.compile(rb'error', re.I)
+_SQL_WORD = re.compile(rb'sql|syntax', re.I)
 
 def setup_logging():
-    """Create log file with timestamp"""
+    """Create the JSONL event log with timestamp"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"fuzz_results_{timestamp}.txt"
-    return open(filename, "w")
-
-def fuzzer():
-    with open("payloads.txt", "r") as f:
-        payloads = [line.strip() for line in f]
-    
-    # Setup log file
-    log_file = setup_logging()
-    log_file.write(f"Fuzzing started at {datetime.now()}\n")
-    log_file.write(f"Loaded {len(payloads)} payloads\n")
-    log_file.write("="*50 + "\n")
-    
-    print(f"[*] Loaded {len(payloads)} payloads")
-    print(f"[*] Logging to: {log_file.name}")
-    
-    for endpoint_name, endpoint_info in ENDPOINTS.items():
+    return FuzzEventLog(f"fuzz_events_{timestamp}.jsonl")
+
+class RequestTemplate:
+    """
+    JSON body for one (endpoint, field), encoded once
+
+    The body is serialized with a placeholder in the fuzzed field and
+    split around it, so render() only has to JSON-escape the payload and
+    join three byte strings; the output is byte-for-byte what json.dumps
+    would produce for the whole body.
+    """
+
+    __slots__ = ('url', 'field', 'prefix', 'suffix')
+
+    def __init__(self, url, fields, field):
+        data = {}
+        for fld in fields:
+            if fld == field:
+                data[fld] = SLOT
+            elif fld in FIELD_DEFAULTS:
+                data[fld] = FIELD_DEFAULTS[fld]
+        encoded = json.dumps(data).encode('ascii')
+        self.url = url
+        self.field = field
+        self.prefix, _, self.suffix = encoded.partition(json.dumps(SLOT).encode('ascii'))
+
+    def render(self, payload):
+        return b''.join((self.prefix, encode_basestring_ascii(payload).encode('ascii'), self.suffix))
+
+def compile_templates(endpoints):
+    """{(endpoint name, field): RequestTemplate} for every field of every endpoint"""
+    return {(name, field): RequestTemplate(info["url"], info["fields"], field)
+            for name, info in endpoints.items() for field in info["fields"]}
+
+def classify(status, body):
+    """
+    Finding for one response (body as bytes): '500 Error', 'SQL Error' or None
+    Server errors win; otherwise an error page that mentions SQL or a syntax error
+    """
+    if status >= 500:
+        return "500 Error"
+    if _ERROR_WORD.search(body) and _SQL_WORD.search(body):
+        return "SQL Error"
+    return None
+
+class Fuzzer:
+    """
+    Concurrent fuzzing engine
+
+    Every endpoint gets its own pool of `concurrency` workers (or the
+    endpoint's "concurrency" setting) pulling (field, payload) jobs from
+    a shared iterator, and all endpoints run at once over one keep-alive
+    HTTP client. With `limiter` (a RateLimiter) every request waits for a
+    token, and the rate backs off when requests time out, fail or get
+    throttled.
+
+    With `scorer` (an AnomalyScorer) each field is first sent benign values
+    `baseline_rounds` times to learn its normal responses, and fuzz
+    responses that don't already count as errors are scored against that
+    baseline; outliers are recorded as 'Anomaly'.
+
+    Payloads that ask the backend to sleep get their requested delay added
+    to the timeout. If one comes back that much slower than the endpoint's
+    running latency (which includes the fuzzer's own load), it is re-sent
+    at each of `confirm_delays` seconds against zero-delay controls and
+    recorded as 'Time Delay' only if the latency follows the requested
+    delay. An empty `confirm_delays` turns this off.
+    """
+
+    def __init__(self, endpoints, payloads, events, concurrency=DEFAULT_CONCURRENCY,
+                 timeout=DEFAULT_TIMEOUT, limiter=None, max_body=DEFAULT_MAX_BODY, scorer=None,
+                 baseline_rounds=DEFAULT_BASELINE_ROUNDS, confirm_delays=DEFAULT_CONFIRM_DELAYS):
+        self.endpoints = endpoints
+        self.templates = compile_templates(endpoints)
+        self.payloads = payloads            # re-iterable, e.g. a PayloadStream
+        self.events = events                # FuzzEventLog, or anything with write() and finding()
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.limiter = limiter
+        self.max_body = max_body
+        self.scorer = scorer
+        self.baseline_rounds = baseline_rounds
+        self.confirm_delays = confirm_delays
+        self.latency = {name: RttEstimator(timeout) for name in endpoints}  # ordinary latency per endpoint
+        self.stats = {'requests': 0, '500 Error': 0, 'SQL Error': 0, 'Anomaly': 0, 'Time Delay': 0,
+                      'Crash': 0}
+
+    def _jobs(self, endpoint_name, fields):
+        for field in fields:
+            print(f"  -> Fuzzing field: {endpoint_name}.{field}")
+            self.events.write({'type': 'field', 'time': time.time(), 'endpoint': endpoint_name,
+                               'field': field})
+            template = self.templates[(endpoint_name, field)]
+            for payload in self.payloads:
+                yield template, payload
+
+    def _record(self, finding, endpoint_name, field, payload, detail):
+        self.stats[finding] += 1
+        self.events.finding(endpoint_name, field, finding, payload, detail)
+        if finding == "Crash":
+            print(f"[!] Crash with {payload} in {field}")
+        else:
+            print(f"[!] {finding} in {endpoint_name}.{field}")
+
+    async def _send(self, client, template, payload, timeout=None):
+        """
+        POST one payload
+        Returns: (response, seconds it took); raises on timeouts and connection errors
+        """
+        body = template.render(payload)
+        if self.limiter:
+            await self.limiter.acquire()
+        self.stats['requests'] += 1
+        # perf_counter: monotonic and high-resolution, so latencies stay comparable under load
+        start = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(
+                client.request('POST', template.url, headers=JSON_HEADERS,
+                               body=body, max_body=self.max_body),
+                timeout or self.timeout)
+        except Exception:
+            if self.limiter:
+                self.limiter.failure()
+            raise
+        if self.limiter:
+            if response.status in THROTTLED_STATUSES:
+                self.limiter.failure()
+            else:
+                self.limiter.success()
+        return response, time.perf_counter() - start
+
+    async def _confirm_delay(self, client, endpoint_name, template, probe, latency):
+        """Re-test a payload that came back slow; records a 'Time Delay' if it holds up"""
+        async def send(payload, seconds):
+            timeout = self.timeout + seconds
+            try:
+                return (await self._send(client, template, payload, timeout))[1]
+            except asyncio.TimeoutError:
+                return None
+
+        try:
+            confirmed, measured = await confirm_delay(send, probe, self.confirm_delays)
+        except Exception as e:
+            print(f"[-] Could not re-test slow payload in {endpoint_name}.{template.field}: "
+                  f"{str(e) or type(e).__name__}")
+            return
+        retests = ", ".join(f"{seconds:g}s: " + ("timed out" if extra is None else f"+{extra:.2f}s")
+                            for seconds, extra in measured)
+        if confirmed:
+            self._record("Time Delay", endpoint_name, template.field, probe.payload,
+                         f"{latency:.2f}s for a {probe.seconds:g}s delay; re-tested {retests}")
+        else:
+            self.events.write({'type': 'unconfirmed delay', 'time': time.time(),
+                               'endpoint': endpoint_name, 'field': template.field,
+                               'payload': probe.payload, 'latency': latency, 'retests': measured})
+            print(f"[-] Slow response to {probe.payload} in {endpoint_name}.{template.field} "
+                  f"didn't follow the requested delay ({retests}), likely load")
+
+    async def _baseline(self, client, endpoint_name, fields, concurrency):
+        """Send every field its benign values and hand the responses to the scorer"""
+        samples = {field: [] for field in fields}
+        jobs = ((field, value) for _ in range(self.baseline_rounds)
+                for field in fields for value in (FIELD_DEFAULTS.get(field),) + BENIGN_VALUES
+                if value is not None)
+
+        async def worker():
+            for field, value in jobs:
+                try:
+                    response, latency = await self._send(
+                        client, self.templates[(endpoint_name, field)], value)
+                except Exception:
+                    continue
+                self.latency[endpoint_name].sample(latency)
+                samples[field].append(response_features(response.status, response.body, latency))
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        for field, vectors in samples.items():
+            self.scorer.learn((endpoint_name, field), vectors)
+            if not vectors:
+                print(f"[-] No baseline for {endpoint_name}.{field}: every benign request failed")
+
+    async def _fuzz_endpoint(self, client, endpoint_name, endpoint_info):
         url = endpoint_info["url"]
         fields = endpoint_info["fields"]
-        
-        print(f"\n[*] Testing: {endpoint_name} ({url})")
-        log_file.write(f"\nTesting: {endpoint_name} ({url})\n")
-        
-        for field in fields:
-            print(f"  -> Fuzzing field: {field}")
-            log_file.write(f"  Fuzzing field: {field}\n")
-            
-            for payload in payloads:
+        concurrency = max(1, endpoint_info.get("concurrency", self.concurrency))
+
+        print(f"\n[*] Testing: {endpoint_name} ({url}), {concurrency} requests in flight")
+        self.events.write({'type': 'endpoint', 'time': time.time(), 'endpoint': endpoint_name,
+                           'url': url, 'concurrency': concurrency})
+        scorer = self.scorer
+        reference = self.latency[endpoint_name]
+        if scorer and self.baseline_rounds:
+            await self._baseline(client, endpoint_name, fields, concurrency)
+        jobs = self._jobs(endpoint_name, fields)
+
+        async def worker():
+            # Workers share one iterator, so each payload is sent exactly once
+            for template, payload in jobs:
+                field = template.field
+                probe = parse_delay(payload) if self.confirm_delays else None
+                # A time-based payload gets its delay on top of the timeout, or it would just time out
+                timeout = self.timeout + probe.seconds if probe else self.timeout
                 try:
-                    # Build data
-                    data = {}
-                    for fld in fields:
-                        if fld == field:
-                            data[fld] = payload
-                        else:
-                            if fld == "email":
-                                data[fld] = "test@test.com"
-                            elif fld == "password":
-                                data[fld] = "TestPass123"
-                            elif fld == "name":
-                                data[fld] = "Test User"
-                    
-                    response = requests.post(url, json=data, timeout=3)
-                    
-                    # Check for interesting responses
-                    if response.status_code >= 500:
-                        log_entry = f"[!] {datetime.now()} - 500 Error in {endpoint_name}.{field}\n"
-                        log_entry += f"    Payload: {payload}\n"
-                        log_entry += f"    Response: {response.text[:200]}\n"
-                        log_file.write(log_entry + "\n")
-                        print(f"[!] 500 Error in {endpoint_name}.{field}")
-                        
-                    elif "error" in response.text.lower():
-                        if "sql" in response.text.lower() or "syntax" in response.text.lower():
-                            log_entry = f"[!] {datetime.now()} - SQL Error in {endpoint_name}.{field}\n"
-                            log_entry += f"    Payload: {payload}\n"
-                            log_entry += f"    Response: {response.text[:200]}\n"
-                            log_file.write(log_entry + "\n")
-                            print(f"[!] SQL Error in {endpoint_name}.{field}")
-                    
-                    time.sleep(0.1)
-                    
+                    response, latency = await self._send(client, template, payload, timeout)
                 except Exception as e:
-                    log_entry = f"[!] {datetime.now()} - Crash in {endpoint_name}.{field}\n"
-                    log_entry += f"    Payload: {payload}\n"
-                    log_entry += f"    Error: {str(e)}\n"
-                    log_file.write(log_entry + "\n")
-                    print(f"[!] Crash with {payload} in {field}")
-    
-    log_file.write(f"\nFuzzing completed at {datetime.now()}\n")
-    log_file.close()
-    print(f"\n[*] Fuzzing complete! Results saved to: {log_file.name}")
+                    if not (probe and isinstance(e, asyncio.TimeoutError)):
+                        self._record("Crash", endpoint_name, field, payload, str(e) or type(e).__name__)
+                        continue
+                    response, latency = None, timeout    # slower than even the delay allows
+
+                if probe:
+                    if looks_delayed(latency, probe.seconds, reference):
+                        await self._confirm_delay(client, endpoint_name, template, probe, latency)
+                    if response is None:
+                        continue
+                else:
+                    reference.sample(latency)
+
+                finding = classify(response.status, response.body)
+                if finding:
+                    self._record(finding, endpoint_name, field, payload,
+                                 response.body[:200].decode('utf-8', 'replace'))
+                elif scorer and not probe:
+                    # Time-based payloads are judged by the delay check, not on latency outliers
+                    vector = response_features(response.status, response.body, latency)
+                    for found in scorer.add((endpoint_name, field), payload, vector):
+                        self._record("Anomaly", endpoint_name, field, found[0], found[2])
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        if scorer:
+            for field in fields:
+                for found in scorer.flush((endpoint_name, field)):
+                    self._record("Anomaly", endpoint_name, field, found[0], found[2])
+
+    async def run(self):
+        """Fuzz every endpoint concurrently; returns the stats dict"""
+        most = max([self.concurrency] + [info.get("concurrency", 0) for info in self.endpoints.values()])
+        # Park enough keep-alive connections that no worker has to reconnect
+        client = HttpClient(max_body=self.max_body, max_idle_per_host=most,
+                            user_agent="fuzzer/1.0")
+        try:
+            await asyncio.gather(*(self._fuzz_endpoint(client, name, info)
+                                   for name, info in self.endpoints.items()))
+        finally:
+            await client.close()
+        return self.stats
+
+def fuzzer(concurrency=DEFAULT_CONCURRENCY, max_rps=None, backoff=True, timeout=DEFAULT_TIMEOUT,
+           payloads_file="payloads.txt", mutations=(), baseline_rounds=DEFAULT_BASELINE_ROUNDS,
+           threshold=DEFAULT_THRESHOLD, confirm_delays=DEFAULT_CONFIRM_DELAYS):
+    # Streamed once per field, never loaded whole
+    payloads = PayloadStream(payloads_file, mutations)
+    variants = f" plus {', '.join(mutations)} variants" if mutations else ""
+
+    # Setup event log
+    events = setup_logging()
+    events.write({'type': 'start', 'time': time.time(), 'payloads': payloads_file,
+                  'mutations': list(mutations), 'concurrency': concurrency, 'max_rps': max_rps,
+                  'timeout': timeout, 'endpoints': ENDPOINTS})
+
+    print(f"[*] Streaming payloads from {payloads_file}{variants}")
+    print(f"[*] Logging to: {events.path}")
+
+    limiter = None
+    if max_rps:
+        limiter = RateLimiter(max_rps, 'fuzz', adaptive=backoff)
+        print(f"[*] Capped at {max_rps:g} requests/s")
+
+    scorer = None
+    if baseline_rounds:
+        scorer = AnomalyScorer(threshold)
+        print(f"[*] Anomaly scoring against a {baseline_rounds}-round baseline, z > {threshold:g}"
+              f"{'' if scorer.numpy else ' (numpy not installed, scoring in pure Python)'}")
+
+    engine = Fuzzer(ENDPOINTS, payloads, events, concurrency, timeout, limiter,
+                    scorer=scorer, baseline_rounds=baseline_rounds, confirm_delays=confirm_delays)
+    start = time.monotonic()
+    try:
+        stats = asyncio.run(engine.run())
+    finally:
+        elapsed = time.monotonic() - start
+        events.write({'type': 'end', 'time': time.time(), 'elapsed': elapsed, 'stats': engine.stats})
+        index = events.close()
+
+    print(f"\n[*] {stats['requests']} requests in {elapsed:.1f}s "
+          f"({stats['requests'] / elapsed if elapsed else 0:.0f}/s): "
+          f"{stats['500 Error']} server errors, {stats['SQL Error']} SQL errors, "
+          f"{stats['Anomaly']} anomalies, {stats['Time Delay']} time delays, {stats['Crash']} crashes")
+    print(f"\n[*] Fuzzing complete! Events saved to: {events.path} (summary: {index})")
+
+def main(argv=None, prog=None):
+    """Entry point for `python fuzzer.py` and `cli.py fuzz`; returns the exit code"""
+    parser = argparse.ArgumentParser(prog=prog, description='Fuzz the configured API endpoints '
+                                                            'with every payload in payloads.txt')
+    parser.add_argument('--payloads', default='payloads.txt',
+                    help='Payload file, one per line (default: payloads.txt)')
+    parser.add_argument('--mutate', metavar='LIST', default='',
+                    help='Also send encoded variants of each payload: comma-separated from '
+                         'url, double-url, unicode, length (default: none)')
+    parser.add_argument('-c', '--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                    help=f'Requests in flight per endpoint, unless the endpoint sets its own '
+                         f'(default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--max-rps', type=float, metavar='N',
+                    help='Cap requests per second across all endpoints (default: no cap)')
+    parser.add_argument('--no-backoff', action='store_true',
+                    help='Hold --max-rps fixed instead of backing off when requests '
+                         'time out or get throttled')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                    help=f'Deadline per request in seconds (default: {DEFAULT_TIMEOUT})')
+    parser.add_argument('--baseline-rounds', type=int, default=DEFAULT_BASELINE_ROUNDS, metavar='N',
+                    help=f'Benign requests per field and value to learn normal responses from; '
+                         f'0 disables anomaly scoring (default: {DEFAULT_BASELINE_ROUNDS})')
+    parser.add_argument('--anomaly-threshold', type=float, default=DEFAULT_THRESHOLD, metavar='Z',
+                    help=f'Flag responses whose length, word count or latency is more than Z '
+                         f'spreads from the baseline (default: {DEFAULT_THRESHOLD:g})')
+    parser.add_argument('--confirm-delays', metavar='LIST',
+                    default=','.join(map(str, DEFAULT_CONFIRM_DELAYS)),
+                    help='Sleep values in seconds to re-test slow time-based payloads with; '
+                         'empty disables time-based detection (default: %(default)s)')
+    args = parser.parse_args(argv)
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.max_rps is not None and args.max_rps <= 0:
+        parser.error("--max-rps must be greater than 0")
+    if args.timeout <= 0:
+        parser.error("--timeout must be greater than 0")
+    if args.baseline_rounds < 0:
+        parser.error("--baseline-rounds must not be negative")
+    if args.anomaly_threshold <= 0:
+        parser.error("--anomaly-threshold must be greater than 0")
+    try:
+        mutations = parse_mutations(args.mutate)
+    except ValueError as e:
+        parser.error(f"--mutate: {e}")
+    try:
+        confirm_delays = tuple(float(value) for value in args.confirm_delays.split(',') if value.strip())
+    except ValueError:
+        parser.error("--confirm-delays must be a comma-separated list of seconds")
+    if any(seconds <= 0 for seconds in confirm_delays):
+        parser.error("--confirm-delays must all be greater than 0")
+    try:
+        fuzzer(args.concurrency, args.max_rps, not args.no_backoff, args.timeout, args.payloads,
+               mutations, args.baseline_rounds, args.anomaly_threshold, confirm_delays)
+    except FileNotFoundError as e:
+        print(f"[!] Payload file not found: {e.filename}")
+        return 1
+    return 0
 
 if __name__ == "__main__":
-    fuzzer()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,285 @@
+"""
+Pooled asyncio HTTP/1.1 client for recon probes
+Keeps idle keep-alive connections per host, caps how much of each body is
+read, and probes with HEAD before falling back to a range-limited GET
+"""
+
+import asyncio
+import ssl
+from collections import OrderedDict
+from urllib.parse import urljoin, urlsplit
+
+
+DEFAULT_MAX_BODY = 1024          # body bytes read per response
+DEFAULT_MAX_IDLE_PER_HOST = 4    # keep-alive connections parked per host
+DEFAULT_MAX_IDLE_TOTAL = 256     # keep-alive connections parked overall
+MAX_HEADERS = 100
+MAX_REDIRECTS = 5
+USER_AGENT = "recon_tool/1.0"
+
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+# Servers that reject or mishandle HEAD get a small GET instead
+HEAD_FALLBACK_STATUSES = {400, 405, 501}
+
+
+class HttpError(Exception):
+    """Server sent something that isn't valid HTTP/1.x"""
+
+
+class HttpResponse:
+    """Status, headers (lowercased names) and at most max_body bytes of body"""
+
+    __slots__ = ('url', 'method', 'status', 'reason', 'headers', 'body')
+
+    def __init__(self, url, method, status, reason, headers, body):
+        self.url = url
+        self.method = method
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+    def __repr__(self):
+        return f"<HttpResponse {self.method} {self.url} {self.status}>"
+
+
+class HttpClient:
+    """
+    Minimal keep-alive HTTP client shared by every probe in a run
+
+    Connections are keyed by (scheme, address, port, host) so a probe that
+    already resolved a name can connect to the address directly and still
+    send the right Host header / SNI. TLS certificates are not verified;
+    recon targets routinely use self-signed certificates.
+    """
+
+    def __init__(self, max_body=DEFAULT_MAX_BODY, max_idle_per_host=DEFAULT_MAX_IDLE_PER_HOST,
+                 max_idle_total=DEFAULT_MAX_IDLE_TOTAL, user_agent=USER_AGENT):
+        self.max_body = max_body
+        self.max_idle_per_host = max_idle_per_host
+        self.max_idle_total = max_idle_total
+        self.user_agent = user_agent
+        self._idle = OrderedDict()  # key -> [(reader, writer), ...], least recently used first
+        self._idle_count = 0
+        self._ssl_context = None
+        self.stats = {'connections': 0, 'reused': 0, 'requests': 0}
+
+    # ----- connection pool -----
+
+    def _tls(self):
+        if self._ssl_context is None:
+            context = ssl.create_default_context()
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+            self._ssl_context = context
+        return self._ssl_context
+
+    async def _connect(self, key):
+        scheme, address, port, host = key
+        if scheme == 'https':
+            conn = await asyncio.open_connection(address, port, ssl=self._tls(), server_hostname=host)
+        else:
+            conn = await asyncio.open_connection(address, port)
+        self.stats['connections'] += 1
+        return conn
+
+    def _checkout(self, key):
+        idle = self._idle.get(key)
+        if not idle:
+            return None
+        conn = idle.pop()
+        self._idle_count -= 1
+        if not idle:
+            del self._idle[key]
+        return conn
+
+    def _release(self, key, conn):
+        idle = self._idle.setdefault(key, [])
+        self._idle.move_to_end(key)
+        if len(idle) >= self.max_idle_per_host:
+            conn[1].close()
+            return
+        idle.append(conn)
+        self._idle_count += 1
+
+        # Evict from the least recently used hosts to keep the fd count bounded
+        while self._idle_count > self.max_idle_total:
+            oldest_key, oldest = next(iter(self._idle.items()))
+            oldest.pop(0)[1].close()
+            self._idle_count -= 1
+            if not oldest:
+                del self._idle[oldest_key]
+
+    async def close(self):
+        """Close every parked connection"""
+        for idle in self._idle.values():
+            for _, writer in idle:
+                writer.close()
+        self._idle.clear()
+        self._idle_count = 0
+
+    # ----- requests -----
+
+    async def request(self, method, url, address=None, headers=None, body=None, max_body=None):
+        """
+        Send one request, reusing a parked connection when one is available
+        Returns: HttpResponse
+        Raises: OSError if the host can't be reached, HttpError on a malformed response
+        """
+        parts = urlsplit(url)
+        scheme = parts.scheme or 'http'
+        host = parts.hostname
+        port = parts.port or (443 if scheme == 'https' else 80)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        key = (scheme, address or host, port, host)
+
+        lines = [f"{method} {path} HTTP/1.1",
+                 f"Host: {parts.netloc}",
+                 f"User-Agent: {self.user_agent}",
+                 "Accept: */*"]
+        for name, value in (headers or {}).items():
+            lines.append(f"{name}: {value}")
+        if body is not None:
+            lines.append(f"Content-Length: {len(body)}")
+        payload = ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1', 'replace') + (body or b'')
+
+        cap = self.max_body if max_body is None else max_body
+        self.stats['requests'] += 1
+
+        conn = self._checkout(key)
+        if conn is not None:
+            try:
+                response = await self._exchange(key, conn, url, method, payload, cap)
+                self.stats['reused'] += 1
+                return response
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # The server dropped the idle connection; retry once on a fresh one
+                pass
+
+        conn = await self._connect(key)
+        return await self._exchange(key, conn, url, method, payload, cap)
+
+    async def _exchange(self, key, conn, url, method, payload, cap):
+        reader, writer = conn
+        try:
+            writer.write(payload)
+            await writer.drain()
+            version, status, reason, headers = await self._read_head(reader)
+            body, complete = await self._read_body(reader, method, status, headers, cap)
+        except BaseException:
+            writer.close()
+            raise
+
+        keep_alive = (complete and version == 'HTTP/1.1'
+                      and headers.get('connection', '').lower() != 'close')
+        if keep_alive:
+            self._release(key, conn)
+        else:
+            writer.close()
+        return HttpResponse(url, method, status, reason, headers, body)
+
+    async def _read_head(self, reader):
+        line = await reader.readline()
+        if not line:
+            raise ConnectionResetError("connection closed before the response")
+
+        # e.g. b"HTTP/1.1 200 OK"
+        parts = line.decode('latin-1').rstrip('\r\n').split(' ', 2)
+        if len(parts) < 2 or not parts[0].startswith('HTTP/') or not parts[1].isdigit():
+            raise HttpError(f"Malformed status line: {line[:60]!r}")
+        version, status = parts[0], int(parts[1])
+        reason = parts[2] if len(parts) > 2 else ''
+
+        headers = {}
+        for _ in range(MAX_HEADERS):
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n'):
+                return version, status, reason, headers
+            if not line:
+                raise asyncio.IncompleteReadError(b'', None)
+            name, _, value = line.decode('latin-1').partition(':')
+            name = name.strip().lower()
+            value = value.strip()
+            headers[name] = f"{headers[name]}, {value}" if name in headers else value
+        raise HttpError(f"More than {MAX_HEADERS} response headers")
+
+    async def _read_body(self, reader, method, status, headers, cap):
+        """
+        Read at most `cap` body bytes
+        Returns: (body, complete) - complete means the connection is positioned
+        at the next response and can be reused
+        """
+        if method == 'HEAD' or status < 200 or status in (204, 304):
+            return b'', True
+
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            body = bytearray()
+            while True:
+                size_line = await reader.readline()
+                try:
+                    size = int(size_line.split(b';')[0].strip(), 16)
+                except ValueError:
+                    raise HttpError(f"Malformed chunk size: {size_line[:30]!r}")
+                if size == 0:
+                    # Skip trailers up to the blank line
+                    while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass
+                    return bytes(body), True
+                if len(body) + size > cap:
+                    body += await reader.readexactly(cap - len(body))
+                    return bytes(body), False
+                body += await reader.readexactly(size)
+                await reader.readexactly(2)  # CRLF after each chunk
+
+        length = headers.get('content-length')
+        if length is not None and length.isdigit():
+            length = int(length)
+            body = await reader.readexactly(min(length, cap))
+            return body, length <= cap
+
+        # No framing: read until the cap or EOF, then give up on the connection
+        body = bytearray()
+        while len(body) < cap:
+            chunk = await reader.read(cap - len(body))
+            if not chunk:
+                break
+            body += chunk
+        return bytes(body), False
+
+    async def probe(self, host, address=None, scheme='http', follow_redirects=False, port=None):
+        """
+        Check whether host serves HTTP as cheaply as possible:
+        HEAD first, then a GET limited to max_body bytes if HEAD is refused
+        Redirects are only followed when follow_redirects is set.
+        `port` overrides the scheme's default port.
+        Returns: HttpResponse for the final hop
+        """
+        url = f"{scheme}://{host}:{port}/" if port else f"{scheme}://{host}/"
+        for _ in range(MAX_REDIRECTS + 1):
+            # Only reuse the pre-resolved address while we stay on the same host
+            pinned = address if urlsplit(url).hostname == host else None
+            response = await self._probe_once(url, pinned)
+
+            location = response.headers.get('location')
+            if not follow_redirects or response.status not in REDIRECT_STATUSES or not location:
+                return response
+            url = urljoin(url, location)
+            if urlsplit(url).scheme not in ('http', 'https'):
+                return response
+        return response
+
+    async def _probe_once(self, url, address):
+        try:
+            response = await self.request('HEAD', url, address)
+        except HttpError:
+            response = None
+
+        if response is None or response.status in HEAD_FALLBACK_STATUSES:
+            range_header = {'Range': f"bytes=0-{max(self.max_body - 1, 0)}"}
+            response = await self.request('GET', url, address, headers=range_header)
+            if response.status == 206:
+                # Partial content only reflects our Range header; the page itself is a 200
+                response.status = 200
+        return response
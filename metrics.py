@@ -0,0 +1,280 @@
+"""
+Run metrics: counters, latency histograms and in-flight gauges
+Engines record into the process-wide REGISTRY; a MetricsExporter can
+write it out during the run as a Prometheus textfile and/or a JSON
+snapshot, so a slow scan shows whether DNS, connect timeouts, the
+lookup thread pool or the target is the bottleneck
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+
+
+DEFAULT_EXPORT_INTERVAL = 10.0   # seconds between metric file rewrites
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Child:
+    """One labelled series"""
+
+    __slots__ = ('lock', 'value')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self.lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ('lock', 'buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Metric:
+    """
+    A metric family; series are selected with labels(**values)
+    Calling inc/dec/set/observe on the family itself uses the unlabelled series.
+    """
+
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.children = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        return _Child()
+
+    def labels(self, **values):
+        key = tuple(str(values[name]) for name in self.labelnames)
+        child = self.children.get(key)
+        if child is None:
+            with self._lock:
+                child = self.children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        return self.labels()
+
+    def series(self):
+        """Sorted (label values, child) pairs, copied under the lock so other threads can add series"""
+        with self._lock:
+            return sorted(self.children.items())
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+    def dec(self, amount=1):
+        self._default().dec(amount)
+
+    def set(self, value):
+        self._default().set(value)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_text(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Registry:
+    """All metric families of this process, plus labels added to every series"""
+
+    def __init__(self):
+        self.metrics = {}
+        self.const_labels = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, help, labelnames, **kwargs):
+        with self._lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, help, labelnames, **kwargs)
+            return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter, name, help, labelnames)
+
+    def gauge(self, name, help, labelnames=()):
+        return self._register(Gauge, name, help, labelnames)
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram, name, help, labelnames, buckets=buckets)
+
+    def _families(self):
+        with self._lock:
+            return list(self.metrics.values())
+
+    def _series(self, metric):
+        const = list(self.const_labels.items())
+        return [(const + list(zip(metric.labelnames, key)), child) for key, child in metric.series()]
+
+    def render_prometheus(self):
+        """Text exposition format (what node_exporter's textfile collector reads)"""
+        lines = []
+        for metric in self._families():
+            series = self._series(metric)
+            if not series:
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for labels, child in series:
+                if metric.kind != 'histogram':
+                    lines.append(f"{metric.name}{_label_text(labels)} {_number(child.value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float('inf'),), child.counts):
+                    cumulative += count
+                    bucket_labels = labels + [('le', _number(bound))]
+                    lines.append(f"{metric.name}_bucket{_label_text(bucket_labels)} {cumulative}")
+                lines.append(f"{metric.name}_sum{_label_text(labels)} {_number(child.sum)}")
+                lines.append(f"{metric.name}_count{_label_text(labels)} {child.count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """Plain dict of every series, for JSON output"""
+        data = {'time': time.time(), 'labels': dict(self.const_labels), 'metrics': {}}
+        for metric in self._families():
+            series = []
+            for labels, child in self._series(metric):
+                entry = {'labels': dict(labels[len(self.const_labels):])}
+                if metric.kind == 'histogram':
+                    entry.update(count=child.count, sum=child.sum,
+                                 buckets=dict(zip(map(_number, metric.buckets + (float('inf'),)),
+                                                  child.counts)))
+                else:
+                    entry['value'] = child.value
+                series.append(entry)
+            if series:
+                data['metrics'][metric.name] = {'type': metric.kind, 'help': metric.help,
+                                                'series': series}
+        return data
+
+
+REGISTRY = Registry()
+
+# Probe-level metrics shared by the engines; `kind` is dns, http, connect or banner
+PROBES = REGISTRY.counter('recon_probes_total', 'Probes sent', ('kind',))
+TIMEOUTS = REGISTRY.counter('recon_probe_timeouts_total', 'Probes that hit their deadline', ('kind',))
+ERRORS = REGISTRY.counter('recon_errors_total', 'Failures by exception class', ('kind', 'error'))
+PROBE_SECONDS = REGISTRY.histogram('recon_probe_seconds', 'Probe latency', ('kind',))
+INFLIGHT = REGISTRY.gauge('recon_inflight', 'Probes currently in flight', ('kind',))
+DNS_QUEUE_SECONDS = REGISTRY.histogram('recon_dns_queue_seconds',
+                                       'Time lookups waited for a resolver thread')
+CONNECT_RESULTS = REGISTRY.counter('recon_connect_results_total', 'TCP connect outcomes', ('state',))
+PHASE_SECONDS = REGISTRY.gauge('recon_phase_seconds', 'Wall-clock time spent per phase', ('phase',))
+SAVE_SECONDS = REGISTRY.histogram('recon_save_seconds', 'Time to write result files', ('format',))
+RATE = REGISTRY.gauge('recon_rate_limit', 'Current probe rate cap per second', ('limiter',))
+BACKOFFS = REGISTRY.counter('recon_rate_backoffs_total', 'AIMD rate decreases', ('limiter',))
+THROTTLED_SECONDS = REGISTRY.counter('recon_rate_wait_seconds_total',
+                                     'Time probes spent waiting for a token', ('limiter',))
+
+
+class MetricsExporter:
+    """
+    Rewrites metric files every `interval` seconds from a background
+    thread, and once more on close. Each write goes to a temporary file
+    that is renamed into place, so readers never see a partial file.
+    """
+
+    def __init__(self, textfile=None, json_file=None, interval=DEFAULT_EXPORT_INTERVAL,
+                 registry=REGISTRY):
+        self.textfile = textfile
+        self.json_file = json_file
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    @staticmethod
+    def _replace(path, text):
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+    def write(self):
+        """Write the current values now"""
+        try:
+            if self.textfile:
+                self._replace(self.textfile, self.registry.render_prometheus())
+            if self.json_file:
+                self._replace(self.json_file, json.dumps(self.registry.snapshot(), indent=2))
+        except OSError as e:
+            print(f"[!] Could not write metrics: {e}")
+
+    def close(self):
+        """Stop the background writes and write the final values"""
+        if not self._stop.is_set():
+            self._stop.set()
+            self._thread.join()
+            self.write()
@@ -0,0 +1,95 @@
+"""
+Streaming fuzz payloads
+Reads payload corpora lazily (plain or compressed, like wordlists) and
+applies encoding mutations on the fly, so corpora of any size are
+fuzzed without ever being held in memory
+"""
+
+from urllib.parse import quote
+
+from wordlists import open_wordlist
+
+
+DEFAULT_LENGTHS = (256, 4096)   # sizes the length mutation pads payloads out to
+
+
+def url_encode(payload):
+    return quote(payload, safe='')
+
+
+def double_url_encode(payload):
+    return quote(quote(payload, safe=''), safe='')
+
+
+def unicode_encode(payload):
+    """%uXXXX-encode everything but letters and digits (the IIS-style unicode encoding)"""
+    return ''.join(char if char.isascii() and char.isalnum() else f"%u{ord(char):04x}"
+                   for char in payload)
+
+
+def expand_lengths(payload, lengths=DEFAULT_LENGTHS):
+    """The payload repeated out to each of `lengths` characters"""
+    if not payload:
+        return
+    for length in lengths:
+        if length > len(payload):
+            yield (payload * (length // len(payload) + 1))[:length]
+
+
+# name -> payload -> iterable of variants
+MUTATIONS = {
+    'url': lambda payload: (url_encode(payload),),
+    'double-url': lambda payload: (double_url_encode(payload),),
+    'unicode': lambda payload: (unicode_encode(payload),),
+    'length': expand_lengths,
+}
+
+
+def parse_mutations(text):
+    """
+    Parse a comma-separated list of mutation names
+    Raises: ValueError naming any unknown mutation
+    """
+    names = [name.strip() for name in text.split(',') if name.strip()]
+    unknown = [name for name in names if name not in MUTATIONS]
+    if unknown:
+        raise ValueError(f"unknown mutation(s) {', '.join(unknown)} "
+                         f"(choose from {', '.join(MUTATIONS)})")
+    return names
+
+
+class PayloadStream:
+    """
+    Re-iterable stream of payloads from a file or any iterable of lines
+
+    Every iteration reads the source afresh, one line at a time, so each
+    (endpoint, field) pass can walk a huge corpus independently. Lines are
+    stripped and blank ones skipped. Each payload is followed by its
+    variants from `mutations` (names from MUTATIONS); variants that come
+    out identical to the original are dropped.
+    """
+
+    def __init__(self, source, mutations=()):
+        self.source = source
+        self.mutations = [MUTATIONS[name] for name in mutations]
+        if isinstance(source, str):
+            open_wordlist(source).close()   # fail fast on a bad path
+
+    def _lines(self):
+        if isinstance(self.source, str):
+            with open_wordlist(self.source) as lines:
+                yield from lines
+        else:
+            yield from self.source
+
+    def __iter__(self):
+        mutations = self.mutations
+        for line in self._lines():
+            payload = line.strip()
+            if not payload:
+                continue
+            yield payload
+            for mutate in mutations:
+                for variant in mutate(payload):
+                    if variant != payload:
+                        yield variant
@@ -0,0 +1,261 @@
+"""
+Port specifications and compact port bitmaps
+Parses --ports strings like "1-1024,3306,top-1000" and keeps per-host
+port state in 8 KiB bitmaps instead of dicts of Python ints
+"""
+
+MAX_PORT = 65535
+DEFAULT_PORT_SPEC = "21,22,23,25,53,80,110,139,443,445,3389,8080"
+
+# Most commonly open TCP ports, most frequent first (nmap-style ranking).
+# top-N takes the first N of these, then fills up with the remaining ports in ascending order.
+TOP_PORTS = (
+    80, 23, 443, 21, 22, 25, 3389, 110, 445, 139, 143, 53, 135, 3306, 8080, 1723, 111,
+    995, 993, 5900, 1025, 587, 8888, 199, 1720, 465, 548, 113, 81, 6001, 10000, 514,
+    5060, 179, 1026, 2000, 8443, 8000, 32768, 554, 26, 1433, 49152, 2001, 515, 8008,
+    49154, 1027, 5666, 646, 5000, 5631, 631, 49153, 8081, 2049, 88, 79, 5800, 106,
+    2121, 1110, 49155, 6000, 513, 990, 5357, 427, 49156, 543, 544, 5101, 144, 7, 389,
+    8009, 3128, 444, 9999, 5009, 7070, 5190, 3000, 5432, 1900, 3986, 13, 1029, 9,
+    5051, 6646, 49157, 1028, 873, 1755, 2717, 4899, 9100, 119, 37, 6379, 27017, 9200,
+    11211, 5985, 5986, 6443, 9090, 9443, 10250, 2375, 2376, 5672, 15672, 1521, 8161,
+    9000, 9092, 2181, 4443, 7001, 8086, 8181, 8880, 5601, 50000,
+)
+
+SERVICES_FILE = '/etc/services'
+
+# Common services the system database usually lacks; entries there take precedence
+EXTRA_SERVICES = {
+    1433: 'ms-sql-s', 1521: 'oracle', 2181: 'zookeeper', 2375: 'docker', 2376: 'docker-tls',
+    3000: 'http-alt', 3306: 'mysql', 3389: 'ms-wbt-server', 5432: 'postgresql',
+    5601: 'kibana', 5672: 'amqp', 5900: 'vnc', 5985: 'wsman', 5986: 'wsmans',
+    6379: 'redis', 6443: 'kubernetes', 7001: 'weblogic', 8000: 'http-alt',
+    8080: 'http-proxy', 8086: 'influxdb', 8161: 'activemq', 8443: 'https-alt',
+    8888: 'http-alt', 9000: 'http-alt', 9090: 'http-alt', 9092: 'kafka',
+    9200: 'elasticsearch', 9443: 'https-alt', 10250: 'kubelet', 11211: 'memcache',
+    15672: 'rabbitmq-mgmt', 27017: 'mongodb', 50000: 'ibm-db2',
+}
+
+
+class PortSet:
+    """
+    Set of TCP ports stored as a 65536-bit bitmap (8 KiB regardless of size)
+    Iterates in ascending port order.
+    """
+
+    __slots__ = ('bits',)
+
+    def __init__(self, ports=()):
+        self.bits = bytearray((MAX_PORT + 1) // 8)
+        for port in ports:
+            self.add(port)
+
+    def add(self, port):
+        self.bits[port >> 3] |= 1 << (port & 7)
+
+    def discard(self, port):
+        self.bits[port >> 3] &= ~(1 << (port & 7)) & 0xFF
+
+    def __contains__(self, port):
+        return 0 <= port <= MAX_PORT and bool(self.bits[port >> 3] & (1 << (port & 7)))
+
+    def __iter__(self):
+        for index, byte in enumerate(self.bits):
+            if byte:
+                for bit in range(8):
+                    if byte & (1 << bit):
+                        yield (index << 3) | bit
+
+    def __len__(self):
+        return bin(int.from_bytes(self.bits, 'little')).count('1')
+
+    def __bool__(self):
+        return any(self.bits)
+
+    def __eq__(self, other):
+        return isinstance(other, PortSet) and self.bits == other.bits
+
+    def __or__(self, other):
+        result = PortSet()
+        result.bits = bytearray(a | b for a, b in zip(self.bits, other.bits))
+        return result
+
+    def __sub__(self, other):
+        result = PortSet()
+        result.bits = bytearray(a & ~b & 0xFF for a, b in zip(self.bits, other.bits))
+        return result
+
+    def update(self, ports):
+        if isinstance(ports, PortSet):
+            self.bits = bytearray(a | b for a, b in zip(self.bits, ports.bits))
+        else:
+            for port in ports:
+                self.add(port)
+
+    def ranges(self):
+        """Yield (first, last) for each run of consecutive ports"""
+        start = prev = None
+        for port in self:
+            if prev is not None and port == prev + 1:
+                prev = port
+                continue
+            if start is not None:
+                yield start, prev
+            start = prev = port
+        if start is not None:
+            yield start, prev
+
+    def to_spec(self):
+        """Compact string form, e.g. '1-1024,3306' (round-trips through parse_port_spec)"""
+        return ','.join(str(a) if a == b else f"{a}-{b}" for a, b in self.ranges())
+
+    def __repr__(self):
+        return f"PortSet({self.to_spec()!r})"
+
+
+_service_table = None
+
+
+def load_service_table(path=SERVICES_FILE):
+    """
+    Build the port -> service name table from a services(5) file
+    TCP entries come first, then EXTRA_SERVICES, then names only listed
+    for other protocols; within each, the first name for a port wins.
+    Returns: dict
+    """
+    table = {}
+    other = {}
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                fields = line.partition('#')[0].split()
+                if len(fields) < 2:
+                    continue
+                number, _, proto = fields[1].partition('/')
+                if number.isdigit():
+                    (table if proto == 'tcp' else other).setdefault(int(number), fields[0])
+    except OSError:
+        pass  # no services database; the built-in names still apply
+    for names in (EXTRA_SERVICES, other):
+        for port, name in names.items():
+            table.setdefault(port, name)
+    return table
+
+
+def service_name(port):
+    """Standard service name for a TCP port ('unknown' if none)"""
+    global _service_table
+    if _service_table is None:
+        _service_table = load_service_table()
+    return _service_table.get(port, "unknown")
+
+
+class OpenPorts(PortSet):
+    """
+    Open ports of one host: a bitmap plus labels for ports whose service
+    isn't the standard one for that number
+
+    Behaves like the {port: service} dicts the output code expects
+    (items(), [], iteration, len) without a Python object per port.
+    """
+
+    __slots__ = ('labels',)
+
+    def __init__(self, ports=()):
+        super().__init__()
+        self.labels = {}
+        if isinstance(ports, dict):
+            for port, service in ports.items():
+                self[int(port)] = service
+        else:
+            self.update(ports)
+
+    def __setitem__(self, port, service):
+        self.add(port)
+        if service == service_name(port):
+            self.labels.pop(port, None)
+        else:
+            self.labels[port] = service
+
+    def discard(self, port):
+        super().discard(port)
+        self.labels.pop(port, None)
+
+    def __getitem__(self, port):
+        if port not in self:
+            raise KeyError(port)
+        return self.labels.get(port) or service_name(port)
+
+    def get(self, port, default=None):
+        return self[port] if port in self else default
+
+    def items(self):
+        for port in self:
+            yield port, self.labels.get(port) or service_name(port)
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"OpenPorts({self.to_dict()!r})"
+
+
+def port_tiers(ports):
+    """
+    Priority tiers of a scan job's ports, highest priority first
+    Only a tuple of PortSets is tiered; anything else (a PortSet, a range,
+    a list of port numbers) is a single tier.
+    """
+    if isinstance(ports, tuple) and ports and all(isinstance(tier, PortSet) for tier in ports):
+        return list(ports)
+    return [ports]
+
+
+def top_ports(count):
+    """The `count` most common ports, best first"""
+    ranked = list(TOP_PORTS[:count])
+    if count > len(ranked):
+        listed = set(TOP_PORTS)
+        extra = (port for port in range(1, MAX_PORT + 1) if port not in listed)
+        ranked.extend(port for _, port in zip(range(count - len(ranked)), extra))
+    return ranked
+
+
+def parse_port_spec(spec):
+    """
+    Parse a port specification into a PortSet
+    Accepts comma-separated ports (80), ranges (1-1024), top-N sets (top-100)
+    and '-' for every port, e.g. "1-1024,3306,top-1000"
+    Raises: ValueError describing the first bad item
+    """
+    ports = PortSet()
+    for item in spec.replace(' ', '').split(','):
+        if not item:
+            continue
+        if item == '-':
+            first, last = 1, MAX_PORT
+        elif item.lower().startswith('top-'):
+            count = item[4:]
+            if not count.isdigit() or int(count) < 1:
+                raise ValueError(f"Bad top-N set '{item}' (expected e.g. top-100)")
+            ports.update(top_ports(int(count)))
+            continue
+        elif '-' in item:
+            first, _, last = item.partition('-')
+            if not first.isdigit() or not last.isdigit():
+                raise ValueError(f"Bad port range '{item}'")
+            first, last = int(first), int(last)
+            if first > last:
+                raise ValueError(f"Port range '{item}' runs backwards")
+        elif item.isdigit():
+            first = last = int(item)
+        else:
+            raise ValueError(f"Bad port '{item}'")
+
+        if first < 1 or last > MAX_PORT:
+            raise ValueError(f"Port '{item}' is outside 1-{MAX_PORT}")
+        for port in range(first, last + 1):
+            ports.add(port)
+
+    if not ports:
+        raise ValueError("Port specification selects no ports")
+    return ports
@@ -0,0 +1,115 @@
+"""
+Persistent probe-result cache
+Stores DNS answers, HTTP statuses and TCP connect results in a local
+SQLite file so repeat scans of overlapping scopes skip redundant probes
+"""
+
+import json
+import os
+import time
+
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'recon_tool', 'probes.sqlite3')
+DEFAULT_TTLS = {
+    'dns': 3600,   # seconds
+    'http': 3600,
+    'tcp': 3600,
+}
+DEFAULT_MAX_ENTRIES = 1_000_000
+WRITE_BATCH = 500
+
+MISS = object()  # returned by get() when there is no fresh entry (None is a valid value)
+
+
+class ProbeCache:
+    """
+    TTL cache keyed by (host, probe) where probe is 'dns', 'http' or 'tcp/<port>'
+
+    Writes are batched into one transaction per WRITE_BATCH entries. When
+    the cache is closed, expired rows are purged and the oldest rows are
+    evicted until at most max_entries remain.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttls=None, max_entries=DEFAULT_MAX_ENTRIES):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.max_entries = max_entries
+        import sqlite3  # imported here so --no-cache runs skip it
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS probes (
+                host TEXT NOT NULL,
+                probe TEXT NOT NULL,
+                value TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                PRIMARY KEY (host, probe)
+            ) WITHOUT ROWID
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS probes_age ON probes (stored_at)")
+        self._pending = {}
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def _ttl(self, probe):
+        return self.ttls.get(probe.split('/', 1)[0], 0)
+
+    def get(self, host, probe):
+        """
+        Look up a fresh cached result
+        Returns: the stored value, or MISS
+        """
+        key = (host.lower(), probe)
+        if key in self._pending:
+            self.stats['hits'] += 1
+            return self._pending[key][0]
+
+        row = self.db.execute("SELECT value, stored_at FROM probes WHERE host = ? AND probe = ?",
+                              key).fetchone()
+        if row is None or time.time() - row[1] > self._ttl(probe):
+            self.stats['misses'] += 1
+            return MISS
+
+        self.stats['hits'] += 1
+        return json.loads(row[0])
+
+    def put(self, host, probe, value):
+        """Store a JSON-serializable probe result"""
+        if self._ttl(probe) <= 0:
+            return
+        self._pending[(host.lower(), probe)] = (value, time.time())
+        if len(self._pending) >= WRITE_BATCH:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        rows = [(host, probe, json.dumps(value), stored_at)
+                for (host, probe), (value, stored_at) in self._pending.items()]
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?)", rows)
+        self._pending = {}
+
+    def evict(self):
+        """Drop expired entries, then the oldest ones beyond max_entries"""
+        now = time.time()
+        with self.db:
+            for probe_type, ttl in self.ttls.items():
+                self.db.execute("DELETE FROM probes WHERE (probe = ? OR probe LIKE ?) AND stored_at < ?",
+                                (probe_type, probe_type + '/%', now - ttl))
+            excess = self.db.execute("SELECT COUNT(*) FROM probes").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self.db.execute("""
+                    DELETE FROM probes WHERE (host, probe) IN (
+                        SELECT host, probe FROM probes ORDER BY stored_at LIMIT ?
+                    )
+                """, (excess,))
+
+    def close(self):
+        self.flush()
+        self.evict()
+        self.db.close()
@@ -0,0 +1,109 @@
+"""
+Congestion-aware rate limiting for probes
+A token bucket caps probes per second; additive-increase /
+multiplicative-decrease (AIMD) backoff lowers the rate when probes
+start getting lost and recovers it gradually once they stop
+"""
+
+import asyncio
+import time
+
+from metrics import RATE, BACKOFFS, THROTTLED_SECONDS
+
+
+DEFAULT_MIN_RATE = 1.0           # probes/s the backoff never goes below
+DEFAULT_DECREASE = 0.5           # rate multiplier on congestion
+DEFAULT_INCREASE_SHARE = 0.05    # additive step, as a share of the cap
+DEFAULT_LOSS_THRESHOLD = 0.02    # failure share that counts as congestion
+DEFAULT_ADJUST_INTERVAL = 1.0    # seconds between rate adjustments
+MIN_SAMPLES = 10                 # outcomes needed before adjusting
+BURST_SECONDS = 0.1              # bucket depth, in seconds of traffic at the current rate
+
+
+class RateLimiter:
+    """
+    Token bucket with AIMD backoff, shared by every probe of one kind
+
+    acquire() waits for the next slot. Slots are handed out in order, so
+    a thousand waiting probes each sleep once instead of all waking for
+    every token. Probes report back with success() or failure(). At most
+    once per `interval`, a failure share above `loss_threshold` cuts the
+    rate by `decrease`; otherwise it grows by `increase` up to the cap.
+    With adaptive=False the rate stays at the cap.
+    """
+
+    def __init__(self, rate, name='probes', burst=None, adaptive=True, min_rate=DEFAULT_MIN_RATE,
+                 increase=None, decrease=DEFAULT_DECREASE, loss_threshold=DEFAULT_LOSS_THRESHOLD,
+                 interval=DEFAULT_ADJUST_INTERVAL):
+        self.name = name
+        self.max_rate = float(rate)
+        self.rate = self.max_rate
+        self.min_rate = min(min_rate, self.max_rate)
+        self.burst = burst
+        self.adaptive = adaptive
+        self.increase = increase if increase is not None else self.max_rate * DEFAULT_INCREASE_SHARE
+        self.decrease = decrease
+        self.loss_threshold = loss_threshold
+        self.interval = interval
+
+        self.tokens = self._depth()
+        self.updated = time.monotonic()
+        self._successes = 0
+        self._failures = 0
+        self._adjusted = self.updated
+        self.stats = {'acquired': 0, 'waited': 0.0, 'decreases': 0, 'increases': 0,
+                      'lowest_rate': self.rate}
+        RATE.labels(limiter=name).set(self.rate)
+
+    def _depth(self):
+        return self.burst if self.burst is not None else max(1.0, self.rate * BURST_SECONDS)
+
+    def _reserve(self):
+        """Take a token, going into debt if none are left; returns seconds to wait"""
+        now = time.monotonic()
+        self.tokens = min(self._depth(), self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    async def acquire(self):
+        """Wait until the bucket allows one more probe"""
+        delay = self._reserve()
+        self.stats['acquired'] += 1
+        if delay > 0:
+            self.stats['waited'] += delay
+            THROTTLED_SECONDS.labels(limiter=self.name).inc(delay)
+            await asyncio.sleep(delay)
+
+    def success(self):
+        self._successes += 1
+        self._maybe_adjust()
+
+    def failure(self, count=1):
+        """A probe (or `count` attempts of one) was lost, timed out or throttled"""
+        self._failures += count
+        self._maybe_adjust()
+
+    def _maybe_adjust(self):
+        if not self.adaptive:
+            return
+        total = self._successes + self._failures
+        now = time.monotonic()
+        if total < MIN_SAMPLES or now - self._adjusted < self.interval:
+            return
+
+        if self._failures / total > self.loss_threshold:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.stats['decreases'] += 1
+            self.stats['lowest_rate'] = min(self.stats['lowest_rate'], self.rate)
+            BACKOFFS.labels(limiter=self.name).inc()
+        elif self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+            self.stats['increases'] += 1
+        # Outcomes of probes sent at the old rate say nothing about the new one
+        self._successes = self._failures = 0
+        self._adjusted = now
+        RATE.labels(limiter=self.name).set(self.rate)
+
+    def __repr__(self):
+        return f"<RateLimiter {self.name} {self.rate:.0f}/s (cap {self.max_rate:.0f}/s)>"
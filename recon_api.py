@@ -0,0 +1,655 @@
+"""
+Importable recon engine
+Subdomain enumeration and port scanning without argparse or console
+output: results come back as compact slots-based records, and progress
+is reported through callbacks (or an async iterator) only when asked for.
+recon_tool.py is the command-line front end built on these functions.
+
+    from recon_api import recon
+    result = recon('example.com', target='example.com', ports='top-100')
+    for sub in result.subdomains:
+        print(sub.name, sub.status)
+"""
+
+import asyncio
+import errno
+import itertools
+import os
+import socket
+import time
+
+from resolver import Resolver, DEFAULT_DNS_THREADS
+from wordlists import WordlistStream
+from http_client import HttpClient
+from probe_cache import MISS
+from timing import RttEstimator, Deadline, DEFAULT_MIN_TIMEOUT, DEFAULT_RETRIES
+from port_spec import (OpenPorts, PortSet, parse_port_spec, port_tiers, service_name,
+                       DEFAULT_PORT_SPEC)
+from baseline import prioritized_labels
+from fingerprint import Fingerprint, ResponseClusters, fingerprint, DEFAULT_MAX_DISTANCE
+from metrics import PROBES, TIMEOUTS, ERRORS, PROBE_SECONDS, INFLIGHT
+from sharding import in_shard
+from scheduler import (ScanScheduler, PORT_OPEN, PORT_CLOSED, DEFAULT_PORT_CONCURRENCY,
+                       DEFAULT_PER_HOST_CONCURRENCY, DEFAULT_CONNECT_TIMEOUT)
+
+
+DEFAULT_CONCURRENCY = 1000  # probes in flight during subdomain enumeration
+DEFAULT_PROBE_TIMEOUT = 5   # seconds per probe
+THROTTLED_STATUSES = (429, 503)  # HTTP answers that mean "slow down"
+BUILTIN_SUBDOMAINS = ['mail', 'ftp', 'blog', 'api']
+DEFAULT_PORTS = parse_port_spec(DEFAULT_PORT_SPEC)
+
+
+# ----- result records -----
+
+class Subdomain:
+    """
+    A confirmed subdomain
+    status and address are None for names restored from a checkpoint;
+    same_as names the subdomain whose response this one duplicates.
+    """
+
+    __slots__ = ('name', 'status', 'address', 'same_as')
+
+    def __init__(self, name, status=None, address=None, same_as=None):
+        self.name = name
+        self.status = status
+        self.address = address
+        self.same_as = same_as
+
+    def __repr__(self):
+        return f"<Subdomain {self.name} {self.status}>"
+
+
+class Host:
+    """Port scan result for one target; ports is an OpenPorts bitmap"""
+
+    __slots__ = ('target', 'ports', 'srtt', 'timeout', 'closed')
+
+    def __init__(self, target, ports, srtt=None, timeout=None, closed=None):
+        self.target = target
+        self.ports = ports
+        self.srtt = srtt            # smoothed connect RTT in seconds, None if never measured
+        self.timeout = timeout      # connect timeout the scan ended with
+        # Ports that refused the connection this scan (not filtered ones, not cache hits)
+        self.closed = closed if closed is not None else PortSet()
+
+    @classmethod
+    def from_rtt(cls, target, ports, rtt, closed=None):
+        if rtt is None or not rtt.samples:
+            return cls(target, ports, closed=closed)
+        return cls(target, ports, rtt.srtt, rtt.timeout, closed)
+
+    def __repr__(self):
+        return f"<Host {self.target} {len(self.ports)} open>"
+
+
+class ReconResult:
+    """Everything one recon() call found"""
+
+    __slots__ = ('subdomains', 'timeouts', 'hosts', 'clusters')
+
+    def __init__(self, subdomains=None, timeouts=None, hosts=None, clusters=None):
+        self.subdomains = subdomains if subdomains is not None else []   # [Subdomain]
+        self.timeouts = timeouts if timeouts is not None else []         # [name]
+        self.hosts = hosts if hosts is not None else {}                  # {target: Host}
+        self.clusters = clusters                                         # ResponseClusters or None
+
+    def to_dict(self):
+        """The results dict save_results and display_results work with"""
+        results = {'subdomains': [sub.name for sub in self.subdomains],
+                   'ports': {target: host.ports for target, host in self.hosts.items()}}
+        if self.clusters is not None and self.clusters.groups():
+            results['clusters'] = self.clusters.groups()
+        return results
+
+    def __repr__(self):
+        return f"<ReconResult {len(self.subdomains)} subdomains, {len(self.hosts)} hosts>"
+
+
+def _silent(message):
+    pass
+
+
+# ----- subdomain enumeration -----
+
+def enumerate_subdomains(domain, wordlist_file=None, concurrency=DEFAULT_CONCURRENCY,
+                         timeout=DEFAULT_PROBE_TIMEOUT, dns_threads=DEFAULT_DNS_THREADS,
+                         follow_redirects=False, checkpoint=None, cache=None, shard=None,
+                         on_found=None, priority=(), sample_rate=1.0, sample_seed=0,
+                         resolve_func=None, http_port=None, limiter=None, clusters=None,
+                         on_timeout=None, log=None):
+    """
+    Discover subdomains using a wordlist or common patterns
+    Probes run on an asyncio engine with up to `concurrency` requests
+    in flight, each bounded by a `timeout` second deadline that covers
+    both the DNS lookup and the HTTP request.
+    Names are resolved first (on `dns_threads` lookup threads) and only
+    names with non-wildcard DNS records are probed over HTTP, using a
+    shared keep-alive client that tries HEAD before a range-limited GET.
+    Progress is journaled to `checkpoint` when one is given, and fresh
+    DNS/HTTP results in `cache` are reused instead of probing again.
+    With `shard` (index, count) only the labels that shard owns are probed.
+    on_found(Subdomain) is called as each new subdomain is confirmed and
+    on_timeout(name) for each name whose probe ran out of time.
+    `priority` labels are probed before the wordlist, of which only a
+    `sample_rate` share (picked by `sample_seed`) is probed.
+    resolve_func and http_port replace the system resolver and port 80
+    (used to point the engine at local stand-ins, e.g. by benchmark.py).
+    DNS lookups and HTTP probes that go out wait on `limiter` (a
+    RateLimiter), which backs off when they time out or are throttled.
+    Each discovered name is filed in `clusters` (a ResponseClusters) by
+    the fingerprint of its response, so catch-alls can be told apart.
+    Status lines go to log(message) when given; nothing is printed.
+    Returns: (list of Subdomain records, list of subdomains that timed out)
+    """
+    return asyncio.run(enumerate_async(domain, wordlist_file, concurrency, timeout, dns_threads,
+                                       follow_redirects, checkpoint, cache, shard, on_found,
+                                       priority, sample_rate, sample_seed, resolve_func,
+                                       http_port, limiter, clusters, on_timeout, log))
+
+
+async def enumerate_async(domain, wordlist_file=None, concurrency=DEFAULT_CONCURRENCY,
+                          timeout=DEFAULT_PROBE_TIMEOUT, dns_threads=DEFAULT_DNS_THREADS,
+                          follow_redirects=False, checkpoint=None, cache=None, shard=None,
+                          on_found=None, priority=(), sample_rate=1.0, sample_seed=0,
+                          resolve_func=None, http_port=None, limiter=None, clusters=None,
+                          on_timeout=None, log=None):
+    """
+    enumerate_subdomains on the caller's event loop, for long-lived services
+    Returns: (list of Subdomain records, list of subdomains that timed out)
+    """
+    log = log or _silent
+    log(f"[*] Starting subdomain enumeration for: {domain}")
+
+    # Auto-detect wordlist.txt if no file specified
+    if not wordlist_file and os.path.exists('wordlist.txt'):
+        wordlist_file = 'wordlist.txt'
+        log(f"[*] Auto-detected local wordlist: {wordlist_file}")
+
+    if wordlist_file:
+        try:
+            # Streamed and deduplicated as probing runs, never held in memory
+            wordlist = WordlistStream(wordlist_file)
+            log(f"[*] Streaming subdomains from: {wordlist_file}")
+        except FileNotFoundError:
+            log(f"[!] Wordlist file not found: {wordlist_file}")
+            return [], []
+    else:
+        wordlist = WordlistStream(BUILTIN_SUBDOMAINS)
+        log(f"[*] Using built-in list of {len(BUILTIN_SUBDOMAINS)} subdomains")
+
+    concurrency = max(1, concurrency)
+    raise_fd_limit(concurrency, log)
+    log(f"[*] Probing with {concurrency} concurrent requests ({timeout}s deadline)")
+
+    resolver = Resolver(threads=dns_threads, resolve_func=resolve_func, cache=cache, limiter=limiter)
+    try:
+        results = await _enumerate_async(domain, wordlist, concurrency, timeout, resolver,
+                                         follow_redirects, checkpoint, cache, shard, on_found,
+                                         priority, sample_rate, sample_seed, http_port, limiter,
+                                         clusters, on_timeout, log)
+    finally:
+        resolver.close()
+        wordlist.close()
+
+    stats = wordlist.stats
+    log(f"[*] Wordlist: {stats['unique']} unique labels probed "
+        f"({stats['duplicates']} duplicates, {stats['skipped']} blank/invalid lines skipped)")
+    return results
+
+
+async def _enumerate_async(domain, wordlist, concurrency, timeout, resolver,
+                           follow_redirects=False, checkpoint=None, cache=None, shard=None,
+                           on_found=None, priority=(), sample_rate=1.0, sample_seed=0,
+                           http_port=None, limiter=None, clusters=None, on_timeout=None,
+                           log=_silent):
+    """
+    Run `concurrency` workers that pull names from the wordlist until it is exhausted
+    Each name is resolved first; only names with real (non-wildcard) records get an HTTP probe
+    Returns: (discovered, timeouts)
+    """
+    discovered = []
+    timeouts = []
+    if priority or sample_rate < 1:
+        wordlist = prioritized_labels(wordlist, priority, sample_rate, sample_seed)
+        log(f"[*] Rechecking {len(priority)} known labels first, then sampling "
+            f"{sample_rate:.0%} of the wordlist")
+    if shard is not None:
+        wordlist = (label for label in wordlist if in_shard(label, shard))
+        log(f"[*] Shard {shard[0]}/{shard[1]}: probing the labels this shard owns")
+    labels = enumerate(wordlist)
+    client = HttpClient()
+
+    if checkpoint is not None and checkpoint.position:
+        # Resuming: restore earlier findings and skip labels that were already probed
+        names = list(dict.fromkeys(checkpoint.subdomains))
+        discovered.extend(map(Subdomain, names))
+        timeouts.extend(dict.fromkeys(checkpoint.timeouts))
+        if clusters is not None:
+            restore_clusters(clusters, names, checkpoint)
+        for _ in itertools.islice(labels, checkpoint.position):
+            pass
+        log(f"[*] Resuming after {checkpoint.position} labels "
+            f"({len(discovered)} subdomains already found)")
+    found = {sub.name for sub in discovered}
+
+    wildcard = await resolver.detect_wildcard(domain, timeout=timeout)
+    if wildcard:
+        log(f"[!] Wildcard DNS detected: *.{domain} -> {', '.join(sorted(wildcard))}")
+        log("[*] Names that only resolve to these addresses will be skipped")
+
+    async def probe_status(subdomain, address, deadline):
+        """
+        HTTP status for subdomain (None if nothing listens) and the
+        Fingerprint of its response, from the cache when fresh
+        The request gets whatever `deadline` (a timing.Deadline) has left after DNS.
+        """
+        probe = 'http/follow' if follow_redirects else 'http'
+        if cache is not None:
+            cached = cache.get(subdomain, probe)
+            if cached is not MISS:
+                # Entries cached before fingerprinting have only the status
+                cached_fp = cache.get(subdomain, f"{probe}/fp")
+                return cached, None if cached_fp in (MISS, None) else Fingerprint.from_list(cached_fp)
+
+        if limiter:
+            await limiter.acquire()
+        PROBES.labels(kind='http').inc()
+        inflight = INFLIGHT.labels(kind='http')
+        inflight.inc()
+        start = time.monotonic()
+        try:
+            response = await deadline.run(
+                client.probe(subdomain, address=address, follow_redirects=follow_redirects,
+                             port=http_port))
+            status = response.status
+            fp = fingerprint(response, subdomain)
+        except asyncio.TimeoutError:
+            # Checked before OSError: TimeoutError is an OSError subclass since Python 3.11
+            TIMEOUTS.labels(kind='http').inc()
+            if limiter:
+                limiter.failure()
+            raise
+        except ConnectionRefusedError as e:
+            # Nothing is listening on port 80
+            ERRORS.labels(kind='http', error=type(e).__name__).inc()
+            status = fp = None
+        except OSError as e:
+            # Resets and other drops mid-exchange are the other sign of being pushed too hard.
+            # They say nothing about the host, so like a timeout: reported, retried, never cached
+            ERRORS.labels(kind='http', error=type(e).__name__).inc()
+            if limiter:
+                limiter.failure()
+            raise asyncio.TimeoutError(f"HTTP probe of {subdomain} failed: {e}") from e
+        except Exception as e:
+            ERRORS.labels(kind='http', error=type(e).__name__).inc()
+            raise
+        finally:
+            inflight.dec()
+            PROBE_SECONDS.labels(kind='http').observe(time.monotonic() - start)
+
+        if limiter and status is not None:
+            if status in THROTTLED_STATUSES:
+                limiter.failure()
+            else:
+                limiter.success()
+
+        if cache is not None:
+            cache.put(subdomain, probe, status)
+            cache.put(subdomain, f"{probe}/fp", fp.to_list() if fp else None)
+        return status, fp
+
+    async def worker():
+        # Workers share one iterator, so memory stays flat however long the list is
+        for index, sub in labels:
+            subdomain = f"{sub}.{domain}"
+            status = fp = address = None
+            # DNS and HTTP share one `timeout` per name
+            deadline = Deadline(timeout)
+            try:
+                addresses = await resolver.filter(subdomain, deadline=deadline)
+                if addresses is not None:
+                    address = min(addresses)
+                    status, fp = await probe_status(subdomain, address, deadline)
+            except asyncio.TimeoutError:
+                timeouts.append(subdomain)
+                if checkpoint is not None:
+                    checkpoint.subdomain_timeout(subdomain)
+                if on_timeout:
+                    on_timeout(subdomain)
+            except Exception as e:
+                ERRORS.labels(kind='subdomain', error=type(e).__name__).inc()
+                log(f"[!] Error checking {subdomain}: {e}")
+
+            if status is not None and status < 500 and subdomain not in found:
+                found.add(subdomain)
+                representative = subdomain
+                if clusters is not None:
+                    representative = clusters.add(subdomain, fp, address)
+                record = Subdomain(subdomain, status, address,
+                                   representative if representative != subdomain else None)
+                discovered.append(record)
+                if checkpoint is not None:
+                    checkpoint.subdomain_found(subdomain, fp.to_list() if fp else None, address)
+                if on_found:
+                    on_found(record)
+
+            # Cancelled probes never get here, so they are redone on --resume
+            if checkpoint is not None:
+                checkpoint.label_done(index)
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        await client.close()
+
+    stats = resolver.stats
+    log(f"[*] DNS: {stats['resolved']} resolved, {stats['unresolved']} unresolved, "
+        f"{stats['wildcard']} wildcard-only")
+    if clusters is not None and len(clusters) < len(discovered):
+        log(f"[*] Responses: {len(discovered)} subdomains serve {len(clusters)} distinct responses "
+            f"({clusters.stats['exact']} exact and {clusters.stats['similar']} near duplicates)")
+    return discovered, timeouts
+
+
+def restore_clusters(clusters, names, checkpoint):
+    """Refile subdomains found before a resume under their journaled fingerprints"""
+    for name in names:
+        fp, address = checkpoint.responses.get(name, (None, None))
+        clusters.add(name, Fingerprint.from_list(fp) if fp else None, address)
+
+
+def raise_fd_limit(wanted, log=None):
+    """
+    Lift the soft open-file limit so `wanted` sockets can be open at once
+    (no-op where the resource module isn't available, e.g. Windows)
+    """
+    try:
+        import resource
+    except ImportError:
+        return
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    needed = wanted + 64  # headroom for stdio, log files, the event loop
+    if soft == resource.RLIM_INFINITY or soft >= needed:
+        return
+
+    target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+    try:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+    except (ValueError, OSError):
+        pass
+    if target < needed and log:
+        log(f"[!] Open-file limit is {target}; lower --concurrency if probes fail with 'Too many open files'")
+
+
+# ----- port scanning -----
+
+def scan_ports(target, ports=None, max_workers=50, timeout=3, retries=DEFAULT_RETRIES,
+               on_port_done=None, log=None):
+    """
+    Scan for open ports on a target
+    The 3 second timeout is only used until the first connects have
+    measured the host's RTT; after that it adapts per host.
+    on_port_done(port, service) is called as each port finishes
+    (service is None for ports that aren't open)
+    Returns: dict of port:service pairs
+    """
+    log = log or _silent
+    log(f"[*] Starting port scan for: {target}")
+
+    # Default ports if none provided
+    if ports is None:
+        ports = DEFAULT_PORTS
+
+    open_ports = {}
+    rtt = RttEstimator(timeout)
+
+    for port in ports:
+        service = None
+        try:
+            for attempt in range(retries + 1):
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sock.settimeout(rtt.retry_timeout(attempt))
+
+                start = time.monotonic()
+                result = sock.connect_ex((target, port))  # Returns 0 if success
+                elapsed = time.monotonic() - start
+                sock.close()
+
+                # Connected or refused (RST): either way a full round trip
+                if result in (0, errno.ECONNREFUSED):
+                    rtt.sample(elapsed)
+                    break
+                if result not in (errno.EAGAIN, errno.EWOULDBLOCK, errno.ETIMEDOUT):
+                    break
+
+            if result == 0:
+                # Try to get service name
+                service = service_name(port)
+
+                open_ports[port] = service
+                log(f"[+] Port {port} open ({service})")
+
+        except socket.error as e:
+            log(f"[!] Socket error on port {port}: {e}")
+        except Exception as e:
+            log(f"[!] General error on port {port}: {e}")
+
+        if on_port_done:
+            on_port_done(port, service)
+
+    return open_ports
+
+
+def scan_ports_fast(target, ports=None, on_port_done=None, cache=None,
+                    concurrency=DEFAULT_PORT_CONCURRENCY, timeout=DEFAULT_CONNECT_TIMEOUT,
+                    min_timeout=DEFAULT_MIN_TIMEOUT, retries=DEFAULT_RETRIES, banners=None,
+                    limiter=None):
+    """
+    Faster port scanner using non-blocking asyncio connects
+    Up to `concurrency` connects are in flight at once; thread and memory
+    use stay flat for any port range. Connect timeouts start at `timeout`
+    seconds and shrink to fit the host's measured RTT (never below
+    `min_timeout`); timed-out connects are retried `retries` times.
+    on_port_done(port, service) is called as each port finishes
+    (service is None for ports that aren't open)
+    Ports with a fresh result in `cache` are not probed again.
+    Services are named from the port table, or from the banner when a
+    BannerGrabber is passed in `banners`. With a RateLimiter in `limiter`
+    connect attempts are paced and back off when they start getting lost.
+    Returns: dict of port:service pairs
+    """
+    return scan_host(target, ports, on_port_done, cache, concurrency, timeout,
+                     min_timeout, retries, banners, limiter).to_dict()
+
+
+def scan_host(target, ports=None, on_port_done=None, cache=None,
+              concurrency=DEFAULT_PORT_CONCURRENCY, timeout=DEFAULT_CONNECT_TIMEOUT,
+              min_timeout=DEFAULT_MIN_TIMEOUT, retries=DEFAULT_RETRIES, banners=None,
+              limiter=None):
+    """
+    Same scan as scan_ports_fast, keeping the result as a port bitmap
+    Returns: OpenPorts
+    """
+    def record(target, port, service, state):
+        if on_port_done:
+            on_port_done(port, service)
+
+    results = scan_targets([(target, ports)], on_port_done=record, cache=cache,
+                           concurrency=concurrency, per_host=concurrency, timeout=timeout,
+                           min_timeout=min_timeout, retries=retries, banners=banners,
+                           limiter=limiter)
+    return results[target]
+
+
+def scan_targets(jobs, on_port_done=None, on_host_done=None, cache=None,
+                 concurrency=DEFAULT_PORT_CONCURRENCY, per_host=DEFAULT_PER_HOST_CONCURRENCY,
+                 timeout=DEFAULT_CONNECT_TIMEOUT, min_timeout=DEFAULT_MIN_TIMEOUT,
+                 retries=DEFAULT_RETRIES, banners=None, limiter=None, log=None):
+    """
+    Port scan many targets at once through one global scheduler
+    jobs is a list of (target, ports) pairs; ports may also be a tuple of
+    PortSets, scanned in that order (highest priority first; see
+    port_spec.port_tiers). Probes from all targets share
+    `concurrency` connects in flight, with at most `per_host` per target.
+    on_port_done(target, port, service, state) fires for every port, with
+    state one of scheduler's PORT_* outcomes, and on_host_done(Host) as
+    soon as a target is finished.
+    Only open and refused ports go into `cache`; filtered and errored
+    ones say nothing about the port and are probed again next time.
+    Open ports are identified by banner when `banners` is a BannerGrabber,
+    and connects are paced by `limiter` (a RateLimiter) when given.
+    Unresolvable targets and probe errors are reported to log(message).
+    Returns: {target: OpenPorts}
+    """
+    return asyncio.run(scan_targets_async(jobs, on_port_done, on_host_done, cache, concurrency,
+                                          per_host, timeout, min_timeout, retries, banners,
+                                          limiter, log))
+
+
+async def scan_targets_async(jobs, on_port_done=None, on_host_done=None, cache=None,
+                             concurrency=DEFAULT_PORT_CONCURRENCY,
+                             per_host=DEFAULT_PER_HOST_CONCURRENCY,
+                             timeout=DEFAULT_CONNECT_TIMEOUT, min_timeout=DEFAULT_MIN_TIMEOUT,
+                             retries=DEFAULT_RETRIES, banners=None, limiter=None, log=None):
+    """
+    scan_targets on the caller's event loop, for long-lived services
+    Returns: {target: OpenPorts}
+    """
+    cached = {}
+    pending = []
+    for target, ports in jobs:
+        if ports is None:
+            ports = DEFAULT_PORTS
+        tiers = port_tiers(ports)
+        cached[target] = OpenPorts()
+
+        if cache is not None:
+            unknown_tiers = []
+            for tier in tiers:
+                unknown = PortSet()
+                for port in tier:
+                    service = cache.get(target, f"tcp/{port}")
+                    if service is MISS:
+                        unknown.add(port)
+                        continue
+                    if service is not None:
+                        cached[target][port] = service
+                    if on_port_done:
+                        on_port_done(target, port, service,
+                                     PORT_CLOSED if service is None else PORT_OPEN)
+                unknown_tiers.append(unknown)
+            tiers = unknown_tiers
+        pending.append((target, itertools.chain.from_iterable(tiers)))
+
+    def port_done(target, port, service, state):
+        if cache is not None and state in (PORT_OPEN, PORT_CLOSED):
+            cache.put(target, f"tcp/{port}", service)
+        if on_port_done:
+            on_port_done(target, port, service, state)
+
+    def host_done(target, open_ports, rtt, closed):
+        # Fold cache hits back in so callers see one complete result per target
+        for port, service in cached[target].items():
+            open_ports[port] = service
+        if on_host_done:
+            on_host_done(Host.from_rtt(target, open_ports, rtt, closed))
+
+    raise_fd_limit(concurrency, log)
+    scheduler = ScanScheduler(concurrency, per_host, timeout, min_timeout, retries,
+                              on_port_done=port_done, on_host_done=host_done, banners=banners,
+                              limiter=limiter, log=log)
+    return await scheduler.run(pending)
+
+
+# ----- one-call recon -----
+
+def recon(domain=None, target=None, **options):
+    """
+    Enumerate `domain`'s subdomains, then port scan `target` plus one
+    subdomain per distinct response; see recon_async for the options
+    Returns: ReconResult
+    """
+    return asyncio.run(recon_async(domain, target, **options))
+
+
+async def recon_async(domain=None, target=None, wordlist=None, ports=DEFAULT_PORT_SPEC,
+                      concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_PROBE_TIMEOUT,
+                      dns_threads=DEFAULT_DNS_THREADS, follow_redirects=False,
+                      collapse=True, cluster_distance=DEFAULT_MAX_DISTANCE,
+                      port_concurrency=DEFAULT_PORT_CONCURRENCY,
+                      per_host=DEFAULT_PER_HOST_CONCURRENCY,
+                      connect_timeout=DEFAULT_CONNECT_TIMEOUT, min_timeout=DEFAULT_MIN_TIMEOUT,
+                      retries=DEFAULT_RETRIES, cache=None, banners=None, http_limiter=None,
+                      connect_limiter=None, on_subdomain=None, on_timeout=None,
+                      on_port=None, on_host=None, log=None):
+    """
+    recon on the caller's event loop
+    `ports` is a port spec string or a PortSet. With `collapse`, subdomains
+    serving the same response from the same address as one already found
+    are reported but not port scanned. Callbacks: on_subdomain(Subdomain),
+    on_timeout(name), on_port(target, port, service, state) for every port
+    probed (service None unless open; see scan_targets) and on_host(Host)
+    as each target finishes.
+    Returns: ReconResult
+    """
+    if isinstance(ports, str):
+        ports = parse_port_spec(ports)
+    result = ReconResult(clusters=ResponseClusters(cluster_distance) if collapse else None)
+
+    if domain:
+        result.subdomains, result.timeouts = await enumerate_async(
+            domain, wordlist, concurrency, timeout, dns_threads, follow_redirects,
+            cache=cache, on_found=on_subdomain, limiter=http_limiter, clusters=result.clusters,
+            on_timeout=on_timeout, log=log)
+
+    if target:
+        scan = [target]
+        if result.clusters is not None:
+            scan.extend(result.clusters.representatives())
+        else:
+            scan.extend(sub.name for sub in result.subdomains)
+
+        def host_done(host):
+            result.hosts[host.target] = host
+            if on_host:
+                on_host(host)
+
+        await scan_targets_async([(name, ports) for name in dict.fromkeys(scan)],
+                                 on_port_done=on_port, on_host_done=host_done, cache=cache,
+                                 concurrency=port_concurrency, per_host=per_host,
+                                 timeout=connect_timeout, min_timeout=min_timeout,
+                                 retries=retries, banners=banners, limiter=connect_limiter,
+                                 log=log)
+    return result
+
+
+async def iter_recon(domain=None, target=None, **options):
+    """
+    recon_async as an async iterator: yields each Subdomain and Host record
+    as it is found, e.g. `async for record in iter_recon('example.com', 'example.com')`
+    The ReconResult is not yielded; collect the records if you need one.
+    """
+    queue = asyncio.Queue()
+    done = object()
+
+    async def run():
+        try:
+            await recon_async(domain, target, on_subdomain=queue.put_nowait,
+                              on_host=queue.put_nowait, **options)
+        finally:
+            queue.put_nowait(done)
+
+    task = asyncio.ensure_future(run())
+    try:
+        while True:
+            record = await queue.get()
+            if record is done:
+                break
+            yield record
+        await task  # re-raise anything the scan failed with
+    finally:
+        if not task.done():
+            task.cancel()
@@ -7,280 +7,379 @@ Author: Your Name
 import sys
 import os
 import argparse
+import importlib.util
 from datetime import datetime
-import requests
-import socket  
-import concurrent.futures 
+import time
 import json
 import csv
-
-
-def parse_arguments():
-    """Parse command line arguments"""
-    parser = argparse.ArgumentParser(description='Basic reconnaissance tool')
+import re
+
+from resolver import DEFAULT_DNS_THREADS
+from checkpoint import Checkpoint, checkpoint_path, run_identity, read_header
+from probe_cache import ProbeCache, DEFAULT_CACHE_PATH
+from timing import DEFAULT_MIN_TIMEOUT, DEFAULT_RETRIES
+from port_spec import OpenPorts, PortSet, parse_port_spec, DEFAULT_PORT_SPEC
+from result_sink import NdjsonSink, DEFAULT_FLUSH_INTERVAL, DEFAULT_FSYNC_INTERVAL
+from banners import (BannerGrabber, DEFAULT_BANNER_BYTES, DEFAULT_BANNER_TIMEOUT,
+                     DEFAULT_BANNER_CONCURRENCY)
+from baseline import (load_baseline, sample_ports, subdomain_change, port_change, diff_results,
+                      default_sample_seed, DEFAULT_SAMPLE_RATE, CHANGE_GONE, BANNERS_LABEL)
+from ratelimit import RateLimiter
+from fingerprint import ResponseClusters, DEFAULT_MAX_DISTANCE
+from metrics import (MetricsExporter, REGISTRY, ERRORS, PHASE_SECONDS, SAVE_SECONDS,
+                     DEFAULT_EXPORT_INTERVAL)
+from sharding import (parse_shard, split_shard, in_shard, shard_ports, merge_results,
+                      PrefixedOutput)
+from scheduler import (PORT_OPEN, PORT_CLOSED, DEFAULT_PORT_CONCURRENCY, DEFAULT_PER_HOST_CONCURRENCY,
+                       DEFAULT_CONNECT_TIMEOUT)
+# The engines live in recon_api; these names stay importable from here for existing callers
+from recon_api import (enumerate_subdomains, restore_clusters, scan_ports, scan_ports_fast,
+                       scan_host, scan_targets, DEFAULT_CONCURRENCY, DEFAULT_PROBE_TIMEOUT,
+                       DEFAULT_PORTS)
+
+
+def parse_arguments(argv=None, prog=None):
+    """Parse command line arguments (`argv` defaults to sys.argv[1:])"""
+    parser = argparse.ArgumentParser(prog=prog, description='Basic reconnaissance tool')
     parser.add_argument('-d', '--domain', help='Target domain (e.g., example.com)')
     parser.add_argument('-t', '--target', help='Target IP or hostname for port scan')
     parser.add_argument('-o', '--output', help='Save results to file')
     parser.add_argument('--subdomains-only', action='store_true', help='Only run subdomain enumeration')
     parser.add_argument('--ports-only', action='store_true', help='Only run port scanning')
-    parser.add_argument('--format', choices=['json', 'csv', 'txt'], default='json',
-                    help='Output format (default: json)')
+    parser.add_argument('--format', choices=['json', 'csv', 'txt', 'ndjson'], default='json',
+                    help='Output format; ndjson streams each finding as it is found (default: json)')
+    parser.add_argument('--flush-interval', type=float, default=DEFAULT_FLUSH_INTERVAL,
+                    help=f'Longest a streamed finding waits before being written, in seconds '
+                         f'(default: {DEFAULT_FLUSH_INTERVAL})')
+    parser.add_argument('--fsync-interval', type=float, default=DEFAULT_FSYNC_INTERVAL,
+                    help=f'Seconds between fsyncs of the ndjson stream (default: {DEFAULT_FSYNC_INTERVAL})')
     parser.add_argument('-w', '--wordlist', help='Path to subdomain wordlist file')
-    return parser.parse_args()
-
-
-def enumerate_subdomains(domain, wordlist_file=None):
-    """
-    Discover subdomains using a wordlist or common patterns
-    Returns: list of discovered subdomains
-    """
-    print(f"[*] Starting subdomain enumeration for: {domain}")
-    
-    wordlist = []
-    
-    # Auto-detect wordlist.txt if no file specified
-    if not wordlist_file and os.path.exists('wordlist.txt'):
-         wordlist_file = 'wordlist.txt'
-         print(f"[*] Auto-detected local wordlist: {wordlist_file}")
-
-    if wordlist_file:
-        try:
-            with open(wordlist_file, 'r', encoding='utf-8') as f:
-                wordlist = [line.strip() for line in f if line.strip()]
-            print(f"[*] Loaded {len(wordlist)} subdomains from: {wordlist_file}")
-        except FileNotFoundError:
-            print(f"[!] Wordlist file not found: {wordlist_file}")
-            return []
-    
-    else:
-        wordlist = ['mail', 'ftp', 'blog', 'api']
-        print(f"[*] Using built-in list of {len(wordlist)} subdomains")
-    
-    discovered = []
-    timeouts = []
-    
-    for sub in wordlist:
-        subdomain = f"{sub}.{domain}"
-        url = f"http://{subdomain}"
-        try:
-            response = requests.get(url, timeout=5)
-            if response.status_code < 500:
-                discovered.append(subdomain)
-                print(f"[+] Found: {subdomain} (Status: {response.status_code})")
-        except requests.exceptions.ConnectionError:
-            pass
-        except requests.exceptions.Timeout:
-            print(f"[-] Timeout: {subdomain}")
-            timeouts.append(subdomain)
-        except Exception as e:
-            print(f"[!] Error checking {subdomain}: {e}")
-    
-    return discovered, timeouts
-
-
-
-
-def scan_ports(target, ports=None, max_workers=50):
-    """
-    Scan for open ports on a target
-    Returns: dict of port:service pairs
-    """
-    print(f"[*] Starting port scan for: {target}")
-    
-    # Default ports if none provided
-    if ports is None:
-        ports = [21, 22, 23, 25, 53, 80, 110, 139, 443, 445, 3389, 8080]
-    
-    open_ports = {}
-    
-    for port in ports:
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(3)  # 3 second timeout per port
-            
-            result = sock.connect_ex((target, port))  # Returns 0 if success
-            
-            if result == 0:
-                # Try to get service name
-                try:
-                    service = socket.getservbyport(port)
-                except:
-                    service = "unknown"
-                
-                open_ports[port] = service
-                print(f"[+] Port {port} open ({service})")
-            
-            sock.close()
-            
-        except socket.error as e:
-            print(f"[!] Socket error on port {port}: {e}")
-        except Exception as e:
-            print(f"[!] General error on port {port}: {e}")
-    
-    return open_ports
-
-
-
-
-
-
+    parser.add_argument('-c', '--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                    help=f'Subdomain probes in flight at once (default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_PROBE_TIMEOUT,
+                    help=f'Deadline per subdomain probe in seconds (default: {DEFAULT_PROBE_TIMEOUT})')
+    parser.add_argument('-p', '--ports', default=DEFAULT_PORT_SPEC,
+                    help='Ports to scan: lists, ranges and top-N sets, e.g. 1-1024,3306,top-1000 '
+                         '("-" for all ports; default: 12 common ports)')
+    parser.add_argument('--port-concurrency', type=int, default=DEFAULT_PORT_CONCURRENCY,
+                    help=f'TCP connects in flight at once (default: {DEFAULT_PORT_CONCURRENCY})')
+    parser.add_argument('--per-host', type=int, default=DEFAULT_PER_HOST_CONCURRENCY,
+                    help=f'TCP connects in flight against any single target (default: {DEFAULT_PER_HOST_CONCURRENCY})')
+    parser.add_argument('--connect-timeout', type=float, default=DEFAULT_CONNECT_TIMEOUT,
+                    help=f'Initial and maximum TCP connect timeout in seconds; adapts to '
+                         f'measured RTT per host (default: {DEFAULT_CONNECT_TIMEOUT})')
+    parser.add_argument('--min-timeout', type=float, default=DEFAULT_MIN_TIMEOUT,
+                    help=f'Lowest adaptive connect timeout in seconds (default: {DEFAULT_MIN_TIMEOUT})')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                    help=f'Retries for connects that time out (default: {DEFAULT_RETRIES})')
+    parser.add_argument('--max-rps', type=float, metavar='N',
+                    help='Cap subdomain DNS/HTTP requests per second (default: no cap)')
+    parser.add_argument('--max-rate', type=float, metavar='N',
+                    help='Cap TCP connect attempts per second (default: no cap)')
+    parser.add_argument('--no-backoff', action='store_true',
+                    help='Hold --max-rps/--max-rate fixed instead of backing off when '
+                         'probes time out or get throttled')
+    parser.add_argument('--banners', action='store_true',
+                    help='Identify services on open ports from their banners')
+    parser.add_argument('--banner-timeout', type=float, default=DEFAULT_BANNER_TIMEOUT,
+                    help=f'Deadline per banner grab in seconds (default: {DEFAULT_BANNER_TIMEOUT})')
+    parser.add_argument('--banner-bytes', type=int, default=DEFAULT_BANNER_BYTES,
+                    help=f'Most bytes read per banner (default: {DEFAULT_BANNER_BYTES})')
+    parser.add_argument('--banner-concurrency', type=int, default=DEFAULT_BANNER_CONCURRENCY,
+                    help=f'Banner grabs in progress at once (default: {DEFAULT_BANNER_CONCURRENCY})')
+    parser.add_argument('--follow-redirects', action='store_true',
+                    help='Follow HTTP redirects when probing subdomains')
+    parser.add_argument('--no-collapse', action='store_true',
+                    help='Port scan every subdomain, even ones serving the same response '
+                         'from the same address (catch-all vhosts)')
+    parser.add_argument('--cluster-distance', type=int, default=DEFAULT_MAX_DISTANCE,
+                    help=f'SimHash bits two responses may differ in and still count as the '
+                         f'same page (0-3, default: {DEFAULT_MAX_DISTANCE})')
+    parser.add_argument('--checkpoint', metavar='FILE',
+                    help='Progress journal path (default: recon_<domain>.checkpoint)')
+    parser.add_argument('--resume', action='store_true',
+                    help='Resume an interrupted run from its checkpoint')
+    parser.add_argument('--cache', metavar='FILE', default=DEFAULT_CACHE_PATH,
+                    help='Probe-result cache shared across runs (default: ~/.cache/recon_tool/probes.sqlite3)')
+    parser.add_argument('--cache-ttl', type=int, metavar='SECONDS',
+                    help='Reuse cached DNS/HTTP/TCP results younger than this (default: 3600)')
+    parser.add_argument('--no-cache', action='store_true',
+                    help='Probe everything fresh and leave the cache untouched')
+    parser.add_argument('--baseline', metavar='FILE',
+                    help='Previous results file (json/csv/txt/ndjson): recheck what it lists first, '
+                         'sample the rest and report only changes')
+    parser.add_argument('--sample-rate', type=float, default=DEFAULT_SAMPLE_RATE,
+                    help=f'With --baseline, share of unseen labels and ports probed '
+                         f'(0-1, default: {DEFAULT_SAMPLE_RATE})')
+    parser.add_argument('--sample-seed', type=int,
+                    help='With --baseline, which sample to take (default: changes daily)')
+    parser.add_argument('--shard', metavar='i/N',
+                    help='Only do slice i of N (0 <= i < N) of the wordlist and port work, '
+                         'for splitting one job across machines')
+    parser.add_argument('--workers', type=int, default=1,
+                    help='Split the run across this many local processes and merge the results (default: 1)')
+    parser.add_argument('--metrics-file', metavar='FILE',
+                    help='Keep Prometheus metrics for the run in FILE (textfile-collector format)')
+    parser.add_argument('--metrics-json', metavar='FILE',
+                    help='Keep a JSON snapshot of the run metrics in FILE')
+    parser.add_argument('--metrics-interval', type=float, default=DEFAULT_EXPORT_INTERVAL,
+                    help=f'Seconds between metric file updates (default: {DEFAULT_EXPORT_INTERVAL})')
+    parser.add_argument('--dns-threads', type=int, default=DEFAULT_DNS_THREADS,
+                    help=f'Concurrent DNS lookups (default: {DEFAULT_DNS_THREADS})')
+    parser.set_defaults(output_shared=False)
+    return parser.parse_args(argv)
 
 
-
-
-
-import concurrent.futures  # Add this to imports at top
-
 def run_recon(args):
     """
     Main function that runs subdomain and port scanning
     based on command-line arguments
+    The engines come from recon_api; this adds checkpoints, baselines,
+    streaming output and the console progress on top of them.
     """
     results = {'subdomains': [], 'ports': {}}
+    discovered = []
+    ports = parse_port_spec(args.ports)
     
     # Start timestamp
     start_time = datetime.now()
     print(f"[*] Recon started at {start_time.strftime('%H:%M:%S')}")
     print("-" * 50)
     
-    # SUBDOMAIN ENUMERATION
-    if args.domain and not args.ports_only:
-        print(f"\n[ PHASE 1 ] Subdomain Enumeration")
-        print("-" * 30)
-        
-        discovered = enumerate_subdomains(args.domain, args.wordlist)
-        results['subdomains'] = discovered
-        
-        if discovered:
-            print(f"\n[*] Found {len(discovered)} subdomains:")
-            for sub in discovered:
-                print(f"    {sub}")
+    cache = None
+    if not args.no_cache:
+        ttls = None if args.cache_ttl is None else {kind: args.cache_ttl for kind in ('dns', 'http', 'tcp')}
+        cache = ProbeCache(args.cache, ttls=ttls)
+        print(f"[*] Using probe cache: {args.cache}")
+    
+    journal = checkpoint_path(args)
+    checkpoint = Checkpoint(journal, run_identity(args), resume=args.resume)
+    if args.resume:
+        print(f"[*] Resuming from checkpoint: {journal}")
+    else:
+        print(f"[*] Checkpointing progress to: {journal}")
+    
+    shard = parse_shard(args.shard) if args.shard else None
+    if shard:
+        print(f"[*] Running shard {args.shard}")
+    
+    # One limiter per kind of traffic, shared by every probe of that kind
+    http_limiter = connect_limiter = None
+    if args.max_rps:
+        http_limiter = RateLimiter(args.max_rps, 'requests', adaptive=not args.no_backoff)
+        print(f"[*] Subdomain probes capped at {args.max_rps:g} requests/s")
+    if args.max_rate:
+        connect_limiter = RateLimiter(args.max_rate, 'connects', adaptive=not args.no_backoff)
+        print(f"[*] Port scan capped at {args.max_rate:g} connects/s")
+    
+    baseline = None
+    if args.baseline:
+        baseline = load_baseline(args.baseline)
+        print(f"[*] Baseline: {len(baseline.subdomains)} subdomains, "
+              f"{sum(len(p) for p in baseline.ports.values())} open ports from {args.baseline}")
+        print(f"[*] Sampling {args.sample_rate:.0%} of unseen labels/ports (seed {args.sample_seed})")
+        if args.target and not args.subdomains_only and not baseline.use_banners(args.banners):
+            how = {True: "with", False: "without", None: "without recording whether it used"}
+            print(f"[!] Baseline was scanned {how[baseline.banners]} --banners; comparing open "
+                  f"ports only, not their service names")
+    rescanned_subdomains = set()
+    rescanned_ports = {}
+    
+    # Catch-all vhosts answer thousands of names with one page; scan each such page once
+    clusters = None if args.no_collapse else ResponseClusters(args.cluster_distance)
+    
+    sink = None
+    if args.format == 'ndjson':
+        # Resumed runs and --workers processes add to the same stream
+        sink = NdjsonSink(ndjson_path(args), append=args.resume or args.output_shared,
+                          flush_interval=args.flush_interval, fsync_interval=args.fsync_interval)
+        print(f"[*] Streaming results to: {sink.path}")
+    
+    def subdomain_found(record):
+        if record.same_as is None:
+            print(f"[+] Found: {record.name} (Status: {record.status})")
+        else:
+            print(f"[+] Found: {record.name} (Status: {record.status}, same response as {record.same_as})")
+        if sink is None:
+            return
+        if baseline is None:
+            sink.subdomain(record.name)
         else:
-            print("[-] No subdomains found")
+            change = subdomain_change(baseline, record.name)
+            if change:
+                sink.write(change)
     
-    # PORT SCANNING
-    if args.target and not args.subdomains_only:
-        print(f"\n\n[ PHASE 2 ] Port Scanning")
-        print("-" * 30)
-        
-        # If we found subdomains, scan them too
-        targets_to_scan = [args.target]
-        if 'discovered' in locals() and discovered:
-            targets_to_scan.extend(discovered)
-        
-        for target in targets_to_scan:
-            print(f"\n[*] Scanning: {target}")
-            open_ports = scan_ports_fast(target)  # Using faster version
-            results['ports'][target] = open_ports
+    def subdomain_timeout(subdomain):
+        print(f"[-] Timeout: {subdomain}")
+    
+    try:
+        # SUBDOMAIN ENUMERATION
+        if args.domain and not args.ports_only:
+            print(f"\n[ PHASE 1 ] Subdomain Enumeration")
+            print("-" * 30)
+            phase_start = time.monotonic()
             
-            if open_ports:
-                print(f"    Open ports on {target}:")
-                for port, service in open_ports.items():
-                    print(f"      Port {port}: {service}")
+            if 'subdomains' in checkpoint.phases:
+                discovered = list(dict.fromkeys(checkpoint.subdomains))
+                timeouts = list(dict.fromkeys(checkpoint.timeouts))
+                if clusters is not None:
+                    restore_clusters(clusters, discovered, checkpoint)
+                print(f"[*] Already completed in checkpoint ({len(discovered)} subdomains)")
             else:
-                print(f"    No open ports found on {target}")
-    
-    # End timestamp
-    end_time = datetime.now()
-    duration = end_time - start_time
-    
-    print("\n" + "=" * 50)
-    print(f"[*] Recon completed in {duration.total_seconds():.2f} seconds")
-    print(f"[*] Started: {start_time.strftime('%H:%M:%S')}")
-    print(f"[*] Ended:   {end_time.strftime('%H:%M:%S')}")
-    
-    return results
-
-def scan_ports_fast(target, ports=None):
-    """
-    Faster port scanner using multiple threads
-    """
-    if ports is None:
-        ports = [21, 22, 23, 25, 53, 80, 110, 139, 443, 445, 3389, 8080]
-    
-    open_ports = {}
-    
-    def check_port(port):
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(2)
-            result = sock.connect_ex((target, port))
-            sock.close()
+                priority = ()
+                sample_rate = 1.0
+                if baseline is not None:
+                    priority = baseline.labels(args.domain)
+                    sample_rate = args.sample_rate
+                found, timeouts = enumerate_subdomains(args.domain, args.wordlist,
+                                                       args.concurrency, args.timeout,
+                                                       args.dns_threads, args.follow_redirects,
+                                                       checkpoint, cache, shard, subdomain_found,
+                                                       priority, sample_rate, args.sample_seed,
+                                                       limiter=http_limiter, clusters=clusters,
+                                                       on_timeout=subdomain_timeout, log=print)
+                discovered = [sub.name for sub in found]
+                checkpoint.phase_done('subdomains')
+            PHASE_SECONDS.labels(phase='subdomains').set(time.monotonic() - phase_start)
+            if baseline is not None:
+                # A name that timed out this run isn't evidence that it's gone
+                rescanned_subdomains = {f"{label}.{args.domain}" for label in baseline.labels(args.domain)
+                                        if in_shard(label, shard)} - set(timeouts)
+            results['subdomains'] = discovered
+            if clusters is not None and clusters.groups():
+                results['clusters'] = clusters.groups()
+            if http_limiter is not None:
+                print(f"[*] Rate: {http_limiter.rate:.0f} requests/s at the end, "
+                      f"{http_limiter.stats['decreases']} backoffs "
+                      f"(lowest {http_limiter.stats['lowest_rate']:.0f}/s)")
             
-            if result == 0:
-                try:
-                    service = socket.getservbyport(port)
-                except:
-                    service = "unknown"
-                return port, service
-        except:
-            pass
-        return None
-    
-    # Use thread pool to scan multiple ports at once
-    with concurrent.futures.ThreadPoolExecutor(max_workers=50) as executor:
-        future_to_port = {executor.submit(check_port, port): port for port in ports}
-        
-        for future in concurrent.futures.as_completed(future_to_port):
-            result = future.result()
-            if result:
-                port, service = result
-                open_ports[port] = service
-    
-    return open_ports
-
-
-
-
-
-def run_recon(args):
-    """
-    Main function that runs subdomain and port scanning
-    based on command-line arguments
-    """
-    results = {'subdomains': [], 'ports': {}}
-    
-    # Start timestamp
-    start_time = datetime.now()
-    print(f"[*] Recon started at {start_time.strftime('%H:%M:%S')}")
-    print("-" * 50)
-    
-    # SUBDOMAIN ENUMERATION
-    if args.domain and not args.ports_only:
-        print(f"\n[ PHASE 1 ] Subdomain Enumeration")
-        print("-" * 30)
-        
-        discovered = enumerate_subdomains(args.domain)
-        results['subdomains'] = discovered
-        
-        if discovered:
-            print(f"\n[*] Found {len(discovered)} subdomains:")
-            for sub in discovered:
-                print(f"    {sub}")
-        else:
-            print("[-] No subdomains found")
-    
-    # PORT SCANNING
-    if args.target and not args.subdomains_only:
-        print(f"\n\n[ PHASE 2 ] Port Scanning")
-        print("-" * 30)
-        
-        # If we found subdomains, scan them too
-        targets_to_scan = [args.target]
-        if 'discovered' in locals() and discovered:
-            targets_to_scan.extend(discovered)
-        
-        for target in targets_to_scan:
-            print(f"\n[*] Scanning: {target}")
-            open_ports = scan_ports_fast(target)  # Using faster version
-            results['ports'][target] = open_ports
+            if timeouts:
+                print(f"\n[-] {len(timeouts)} subdomains timed out")
             
-            if open_ports:
-                print(f"    Open ports on {target}:")
-                for port, service in open_ports.items():
-                    print(f"      Port {port}: {service}")
+            if discovered:
+                print(f"\n[*] Found {len(discovered)} subdomains:")
+                for sub in discovered:
+                    print(f"    {sub}")
             else:
-                print(f"    No open ports found on {target}")
+                print("[-] No subdomains found")
+        
+        # PORT SCANNING
+        if args.target and not args.subdomains_only:
+            print(f"\n\n[ PHASE 2 ] Port Scanning")
+            print("-" * 30)
+            phase_start = time.monotonic()
+            
+            # If we found subdomains, scan them too (one per catch-all response)
+            scan_subdomains = discovered
+            if clusters is not None and len(clusters) < len(discovered):
+                scan_subdomains = clusters.representatives()
+                print(f"[*] Scanning {len(scan_subdomains)} of {len(discovered)} subdomains; "
+                      f"the rest serve the same response as one of them")
+            targets_to_scan = [args.target]
+            # Recorded so a later --baseline run knows how services were named
+            results['banners'] = bool(args.banners)
+            if sink is not None:
+                sink.write({'type': 'scan', 'banners': results['banners'], 'time': time.time()})
+            if scan_subdomains:
+                targets_to_scan.extend(scan_subdomains)
+            
+            # The explicit target's ports are split across shards; subdomains
+            # are scanned in full by the shard that discovered them
+            target_ports = {target: ports for target in scan_subdomains}
+            target_ports[args.target] = shard_ports(ports, shard)
+            
+            if baseline is not None:
+                # Known open ports first, then a sample of the rest
+                for target in targets_to_scan:
+                    known = PortSet(baseline.open_ports(target))
+                    if target == args.target:
+                        known = shard_ports(known, shard)
+                    rest = sample_ports(target, target_ports[target] - known,
+                                        args.sample_rate, args.sample_seed)
+                    target_ports[target] = (known, rest)
+                    rescanned_ports[target] = known
+            
+            # Skip (target, port) pairs a previous run already finished
+            jobs = [(target, checkpoint.ports_to_scan(target, target_ports[target]))
+                    for target in targets_to_scan]
+            print(f"[*] Scanning {len(jobs)} targets on up to {len(ports)} ports "
+                  f"({args.port_concurrency} connects in flight, {args.per_host} per host)")
+            
+            def host_done(host):
+                # Results stream in per target as soon as its last port is done
+                target, open_ports = host.target, host.ports
+                for port, service in checkpoint.open_ports.get(target, {}).items():
+                    open_ports[port] = service
+                results['ports'][target] = open_ports
+                if target in rescanned_ports:
+                    # Only ports that answered count; filtered or timed out says nothing
+                    rescanned_ports[target] = PortSet(
+                        port for port in rescanned_ports[target]
+                        if port in open_ports or port in host.closed)
+                
+                if host.srtt is not None:
+                    print(f"\n[*] {target}: srtt {host.srtt * 1000:.1f}ms, "
+                          f"connect timeout {host.timeout * 1000:.0f}ms")
+                else:
+                    print(f"\n[*] {target}:")
+                if open_ports:
+                    print(f"    Open ports on {target}:")
+                    for port, service in open_ports.items():
+                        print(f"      Port {port}: {service}")
+                else:
+                    print(f"    No open ports found on {target}")
+            
+            banners = None
+            if args.banners:
+                banners = BannerGrabber(args.banner_concurrency, args.banner_timeout,
+                                        args.banner_bytes)
+            
+            def port_done(target, port, service, state):
+                # Filtered and errored ports stay unjournaled so --resume tries them again
+                if state in (PORT_OPEN, PORT_CLOSED):
+                    checkpoint.port_done(target, port, service)
+                if sink is None or service is None:
+                    return
+                if baseline is None:
+                    sink.port(target, port, service)
+                else:
+                    change = port_change(baseline, target, port, service)
+                    if change:
+                        sink.write(change)
+            
+            scan_targets(jobs, on_port_done=port_done, on_host_done=host_done,
+                         cache=cache, concurrency=args.port_concurrency, per_host=args.per_host,
+                         timeout=args.connect_timeout, min_timeout=args.min_timeout,
+                         retries=args.retries, banners=banners, limiter=connect_limiter, log=print)
+            PHASE_SECONDS.labels(phase='ports').set(time.monotonic() - phase_start)
+            if connect_limiter is not None:
+                print(f"\n[*] Rate: {connect_limiter.rate:.0f} connects/s at the end, "
+                      f"{connect_limiter.stats['decreases']} backoffs "
+                      f"(lowest {connect_limiter.stats['lowest_rate']:.0f}/s)")
+            if banners is not None:
+                print(f"\n[*] Banners: {banners.stats['grabbed']} grabbed, "
+                      f"{banners.stats['identified']} identified")
+        
+        if baseline is not None:
+            results['changes'] = diff_results(baseline, results, rescanned_subdomains,
+                                              rescanned_ports)
+            if sink is not None:
+                # New and changed items were streamed as they turned up
+                for change in results['changes']:
+                    if change['change'] == CHANGE_GONE:
+                        sink.write(change)
+    except BaseException:
+        # Keep the journal so the run can be picked up with --resume
+        checkpoint.close()
+        raise
+    finally:
+        if sink is not None:
+            sink.close()
+        if cache is not None:
+            cache.close()
+            print(f"[*] Cache: {cache.stats['hits']} hits, {cache.stats['misses']} misses")
+    
+    checkpoint.finish()
     
     # End timestamp
     end_time = datetime.now()
@@ -293,47 +392,79 @@ def run_recon(args):
     
     return results
 
-def scan_ports_fast(target, ports=None):
+def shard_worker_args(args):
+    """Per-process argument copies for a --workers run, one shard each"""
+    base = parse_shard(args.shard) if args.shard else None
+    runs = []
+    for index, count in split_shard(base, args.workers):
+        run_args = argparse.Namespace(**vars(args))
+        run_args.shard = f"{index}/{count}"
+        run_args.workers = 1
+        run_args.output_shared = True
+        # Rate caps are for the whole run, so the workers split them
+        if args.max_rps:
+            run_args.max_rps = args.max_rps / args.workers
+        if args.max_rate:
+            run_args.max_rate = args.max_rate / args.workers
+        if args.checkpoint:
+            run_args.checkpoint = f"{args.checkpoint}.shard{index}of{count}"
+        # Separate metric files per worker (the name keeps its extension for the textfile collector)
+        for option in ('metrics_file', 'metrics_json'):
+            path = getattr(args, option)
+            if path:
+                root, ext = os.path.splitext(path)
+                setattr(run_args, option, f"{root}.shard{index}of{count}{ext}")
+        runs.append(run_args)
+    return runs
+
+def run_sharded(args):
     """
-    Faster port scanner using multiple threads
+    Fan a run out over args.workers local processes, one shard each,
+    and merge their results into a single report
     """
-    if ports is None:
-        ports = [21, 22, 23, 25, 53, 80, 110, 139, 443, 445, 3389, 8080]
-    
-    open_ports = {}
-    
-    def check_port(port):
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(2)
-            result = sock.connect_ex((target, port))
-            sock.close()
-            
-            if result == 0:
-                try:
-                    service = socket.getservbyport(port)
-                except:
-                    service = "unknown"
-                return port, service
-        except:
-            pass
-        return None
-    
-    # Use thread pool to scan multiple ports at once
-    with concurrent.futures.ThreadPoolExecutor(max_workers=50) as executor:
-        future_to_port = {executor.submit(check_port, port): port for port in ports}
-        
-        for future in concurrent.futures.as_completed(future_to_port):
-            result = future.result()
-            if result:
-                port, service = result
-                open_ports[port] = service
-    
-    return open_ports
-
+    runs = shard_worker_args(args)
+    print(f"[*] Splitting run across {len(runs)} worker processes")
+    if args.format == 'ndjson' and not args.resume:
+        # Workers append to one shared stream; start it empty
+        open(ndjson_path(args), 'w').close()
+    
+    import multiprocessing  # only --workers runs need it
+    with multiprocessing.Pool(len(runs)) as pool:
+        parts = pool.map(_run_shard_worker, runs)
+    
+    results = merge_results(parts)
+    print(f"\n[*] Merged {len(runs)} shards: {len(results['subdomains'])} subdomains, "
+          f"{len(results['ports'])} targets")
+    return results
 
+def _run_shard_worker(args):
+    # Tag each line so interleaved output from the workers stays readable
+    sys.stdout = PrefixedOutput(sys.stdout, f"[{args.shard}] ")
+    REGISTRY.const_labels['shard'] = args.shard
+    exporter = start_metrics(args)
+    try:
+        return run_recon(args)
+    finally:
+        if exporter is not None:
+            exporter.close()
+
+def start_metrics(args):
+    """Begin writing run metrics to the files named on the command line, if any"""
+    if not (args.metrics_file or args.metrics_json):
+        return None
+    return MetricsExporter(args.metrics_file, args.metrics_json, args.metrics_interval)
 
+def ndjson_path(args):
+    """Where --format ndjson streams results (fixed per run so --resume appends to it)"""
+    if args.output:
+        return f"{args.output}.ndjson"
+    name = re.sub(r'[^A-Za-z0-9._-]', '_', args.domain or args.target or 'run')
+    return f"recon_{name}.ndjson"
 
+def run_checkpoint_paths(args):
+    """Every journal a run writes (one per worker for --workers runs)"""
+    runs = shard_worker_args(args) if args.workers > 1 else [args]
+    return [checkpoint_path(run_args) for run_args in runs]
 
 def save_results(results, filename=None, format='json'):
     """
@@ -343,11 +474,12 @@ def save_results(results, filename=None, format='json'):
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"recon_results_{timestamp}"
     
+    start = time.monotonic()
     try:
         if format.lower() == 'json':
             filename = f"{filename}.json"
             with open(filename, 'w') as f:
-                json.dump(results, f, indent=2, default=str)
+                json.dump(results, f, indent=2, default=_json_default)
             print(f"[*] Results saved to {filename} (JSON format)")
             
         elif format.lower() == 'csv':
@@ -360,16 +492,46 @@ def save_results(results, filename=None, format='json'):
             save_text(results, filename)
             print(f"[*] Results saved to {filename} (Text format)")
             
+        elif format.lower() == 'ndjson':
+            filename = f"{filename}.ndjson"
+            save_ndjson(results, filename)
+            print(f"[*] Results saved to {filename} (NDJSON format)")
+            
         else:
             print(f"[!] Unknown format: {format}. Using JSON.")
-            save_results(results, filename, 'json')
-            
+            return save_results(results, filename, 'json')
+        
+        SAVE_SECONDS.labels(format=format.lower()).observe(time.monotonic() - start)
         return filename
         
     except Exception as e:
+        ERRORS.labels(kind='save', error=type(e).__name__).inc()
         print(f"[!] Failed to save results: {e}")
         return None
 
+def _json_default(obj):
+    """Serialize port bitmaps as {port: service} and anything else as a string"""
+    if isinstance(obj, OpenPorts):
+        return obj.to_dict()
+    return str(obj)
+
+def save_ndjson(results, filename):
+    """
+    Write finished results as NDJSON, one record per subdomain / open port
+    (the same records --format ndjson streams during a run)
+    """
+    sink = NdjsonSink(filename)
+    try:
+        if 'banners' in results:
+            sink.write({'type': 'scan', 'banners': results['banners']})
+        for sub in results.get('subdomains', []):
+            sink.subdomain(sub)
+        for target, ports in results.get('ports', {}).items():
+            for port, service in ports.items():
+                sink.port(target, port, service)
+    finally:
+        sink.close()
+
 def save_csv(results, filename):
     """Save results as CSV spreadsheet"""
     with open(filename, 'w', newline='') as csvfile:
@@ -392,11 +554,23 @@ def save_csv(results, filename):
             for port, service in ports.items():
                 writer.writerow([target, port, service])
         
+        if 'changes' in results:
+            writer.writerow([])
+            writer.writerow(["CHANGES"])
+            writer.writerow(["Change", "Type", "Name/Target", "Port", "Service", "Previous"])
+            for change in results['changes']:
+                writer.writerow([change['change'], change['type'],
+                                 change.get('name') or change.get('target'),
+                                 change.get('port', ''), change.get('service', ''),
+                                 change.get('previous', '')])
+        
         # Summary row
         writer.writerow([])
         writer.writerow(["SUMMARY"])
         writer.writerow(["Subdomains found:", len(results.get('subdomains', []))])
         writer.writerow(["Targets scanned:", len(results.get('ports', {}))])
+        if 'banners' in results:
+            writer.writerow([BANNERS_LABEL, 'yes' if results['banners'] else 'no'])
 
 def save_text(results, filename):
     """Save results as readable text report"""
@@ -427,20 +601,53 @@ def save_text(results, filename):
             else:
                 f.write("  No open ports found\n")
         
+        if results.get('clusters'):
+            f.write("\n\nSAME RESPONSE:\n")
+            f.write("-" * 40 + "\n")
+            for representative, members in results['clusters'].items():
+                f.write(f"  {representative} (+{len(members)}): {', '.join(members)}\n")
+        
+        if 'changes' in results:
+            f.write("\n\nCHANGES:\n")
+            f.write("-" * 40 + "\n")
+            for change in results['changes']:
+                f.write(f"  {describe_change(change)}\n")
+            if not results['changes']:
+                f.write("No changes since baseline\n")
+        
         # Summary
         f.write("\n" + "=" * 60 + "\n")
         f.write("SUMMARY:\n")
         f.write(f"Subdomains found: {len(results.get('subdomains', []))}\n")
         total_ports = sum(len(p) for p in results.get('ports', {}).values())
         f.write(f"Open ports found: {total_ports}\n")
+        if 'banners' in results:
+            f.write(f"{BANNERS_LABEL} {'yes' if results['banners'] else 'no'}\n")
         f.write("=" * 60 + "\n")
 
+def describe_change(change):
+    """One-line description of a baseline change record"""
+    if change['type'] == 'subdomain':
+        return f"[{change['change']}] subdomain {change['name']}"
+    where = f"{change['target']}:{change['port']}"
+    if change['change'] == 'changed':
+        return f"[changed] port {where} {change['previous']} -> {change['service']}"
+    return f"[{change['change']}] port {where} ({change.get('service') or change.get('previous')})"
+
 def display_results(results):
     """Pretty print results to console"""
     print("\n" + "=" * 60)
     print("RESULTS SUMMARY")
     print("=" * 60)
     
+    if 'changes' in results:
+        # Baseline runs only report what moved
+        print(f"\n🔁 CHANGES SINCE BASELINE: {len(results['changes'])}")
+        for change in results['changes']:
+            print(f"   {describe_change(change)}")
+        print("\n" + "=" * 60)
+        return
+    
     # Subdomains
     print(f"\n📁 SUBDOMAINS: {len(results.get('subdomains', []))} found")
     if results.get('subdomains'):
@@ -448,6 +655,8 @@ def display_results(results):
             print(f"   • {sub}")
         if len(results['subdomains']) > 10:
             print(f"   ... and {len(results['subdomains']) - 10} more")
+    for representative, members in results.get('clusters', {}).items():
+        print(f"   ≡ {len(members)} more serve the same response as {representative}")
     
     # Ports
     print(f"\n🔓 OPEN PORTS:")
@@ -492,6 +701,88 @@ def validate_arguments(args):
     if args.subdomains_only and args.ports_only:
         errors.append("Cannot use both --subdomains-only and --ports-only")
     
+    # Check port specification
+    try:
+        parse_port_spec(args.ports)
+    except ValueError as e:
+        errors.append(f"--ports: {e}")
+    
+    # Check probe tuning
+    if args.concurrency < 1:
+        errors.append("--concurrency must be at least 1")
+    if args.timeout <= 0:
+        errors.append("--timeout must be greater than 0")
+    if args.port_concurrency < 1:
+        errors.append("--port-concurrency must be at least 1")
+    if args.per_host < 1:
+        errors.append("--per-host must be at least 1")
+    if args.connect_timeout <= 0:
+        errors.append("--connect-timeout must be greater than 0")
+    if args.min_timeout <= 0:
+        errors.append("--min-timeout must be greater than 0")
+    if args.retries < 0:
+        errors.append("--retries cannot be negative")
+    if args.banner_timeout <= 0:
+        errors.append("--banner-timeout must be greater than 0")
+    if args.banner_bytes < 1:
+        errors.append("--banner-bytes must be at least 1")
+    if args.banner_concurrency < 1:
+        errors.append("--banner-concurrency must be at least 1")
+    if args.flush_interval <= 0:
+        errors.append("--flush-interval must be greater than 0")
+    if args.fsync_interval < 0:
+        errors.append("--fsync-interval cannot be negative")
+    if args.max_rps is not None and args.max_rps <= 0:
+        errors.append("--max-rps must be greater than 0")
+    if args.max_rate is not None and args.max_rate <= 0:
+        errors.append("--max-rate must be greater than 0")
+    if args.metrics_interval <= 0:
+        errors.append("--metrics-interval must be greater than 0")
+    if args.dns_threads < 1:
+        errors.append("--dns-threads must be at least 1")
+    if args.cache_ttl is not None and args.cache_ttl < 0:
+        errors.append("--cache-ttl cannot be negative")
+    
+    # Check sharding
+    if args.shard:
+        try:
+            parse_shard(args.shard)
+        except ValueError as e:
+            errors.append(f"--shard: {e}")
+    if args.workers < 1:
+        errors.append("--workers must be at least 1")
+    
+    # Check baseline
+    if args.baseline:
+        try:
+            load_baseline(args.baseline)
+        except (OSError, ValueError) as e:
+            errors.append(f"--baseline: {e}")
+    if not 0 <= args.sample_rate <= 1:
+        errors.append("--sample-rate must be between 0 and 1")
+    if not 0 <= args.cluster_distance <= 3:
+        errors.append("--cluster-distance must be between 0 and 3")
+    
+    # Check resume state
+    if args.resume and not errors:
+        runs = shard_worker_args(args) if args.workers > 1 else [args]
+        for run_args in runs:
+            path = checkpoint_path(run_args)
+            header = read_header(path)
+            if header is None:
+                errors.append(f"--resume: no checkpoint found at {path}")
+                continue
+            if args.sample_seed is None:
+                # Keep sampling the same slice the interrupted run was working through
+                args.sample_seed = header.get('sample_seed')
+            # The shard copies were made before the seed was known
+            run_args.sample_seed = args.sample_seed
+            if any(header.get(key) != value for key, value in run_identity(run_args).items()):
+                errors.append(f"--resume: {path} was written for a different "
+                              f"domain/target/wordlist/shard/baseline/ports/banners")
+    if args.sample_seed is None:
+        args.sample_seed = default_sample_seed()
+    
     # Check domain for port scanning
     if args.ports_only and not args.target:
         errors.append("--ports-only requires --target")
@@ -501,23 +792,19 @@ def validate_arguments(args):
 def check_dependencies():
     """
     Verify required modules are installed
+    Modules are looked up, not imported, so the check costs nothing on
+    runs that never use them.
     """
     missing = []
     
-    try:
-        import requests
-    except ImportError:
-        missing.append("requests - Install with: pip install requests")
+    if importlib.util.find_spec('asyncio') is None:
+        missing.append("asyncio - Should be built-in to Python 3.7+")
     
-    try:
-        import socket
-    except ImportError:
+    if importlib.util.find_spec('socket') is None:
         missing.append("socket - Should be built-in to Python")
     
-    try:
-        import concurrent.futures
-    except ImportError:
-        missing.append("concurrent.futures - Should be built-in to Python 3.2+")
+    if importlib.util.find_spec('sqlite3') is None:
+        missing.append("sqlite3 - Should be built-in to Python (needed for the probe cache)")
     
     return missing
 
@@ -546,16 +833,22 @@ def safe_run(args):
         print("\n[*] Use --help for usage information")
         return 1
     
+    exporter = start_metrics(args)
     try:
         # Run the actual reconnaissance
-        results = run_recon(args)
+        if args.workers > 1:
+            results = run_sharded(args)
+        else:
+            results = run_recon(args)
         
         # Display results
         display_results(results)
         
         # Save if output requested
-        if args.output:
-            saved_file = save_results(results, args.output)
+        if args.format == 'ndjson':
+            print(f"[*] Results streamed to: {ndjson_path(args)}")
+        elif args.output:
+            saved_file = save_results(results, args.output, args.format)
             if saved_file:
                 print(f"[*] Results also saved to: {saved_file}")
         
@@ -563,26 +856,34 @@ def safe_run(args):
         
     except KeyboardInterrupt:
         print("\n\n[!] Scan interrupted by user (Ctrl+C)")
-        print("[*] Partial results may be available")
+        print(f"[*] Progress saved to {', '.join(run_checkpoint_paths(args))}")
+        print("[*] Run again with --resume to continue where it stopped")
         return 130  # Standard Unix interrupt code
         
     except Exception as e:
         print(f"\n[!] Unexpected error: {e}")
+        print(f"[*] Progress saved to {', '.join(run_checkpoint_paths(args))} (use --resume)")
         print("[*] Please report this issue")
         import traceback
         traceback.print_exc()  # Detailed debug info
         return 1  # Error code
+    
+    finally:
+        if exporter is not None:
+            exporter.close()
+
+def main(argv=None, prog=None):
+    """Entry point for `python recon_tool.py` and `cli.py recon`; returns the exit code"""
+    # Parse arguments
+    args = parse_arguments(argv, prog)
+    
+    # Run with error handling
+    return safe_run(args)
 
 # FINAL PART: Main entry point
 if __name__ == "__main__":
     """
     This runs when you execute: python recon_tool.py
     """
-    # Parse arguments
-    args = parse_arguments()
-    
-    # Run with error handling
-    exit_code = safe_run(args)
-    
     # Exit with proper code
-    sys.exit(exit_code)
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,156 @@
+"""
+DNS resolution stage for subdomain enumeration
+Resolves candidate names concurrently and filters out wildcard answers
+so only names with real records go on to HTTP probing
+"""
+
+import asyncio
+import concurrent.futures
+import random
+import socket
+import string
+import time
+
+from probe_cache import MISS
+from metrics import PROBES, TIMEOUTS, PROBE_SECONDS, INFLIGHT, DNS_QUEUE_SECONDS
+
+
+DEFAULT_DNS_THREADS = 100  # concurrent lookups
+WILDCARD_PROBES = 3        # random labels resolved to detect wildcard zones
+
+
+# getaddrinfo errors that mean the name has no records; anything else (EAI_AGAIN,
+# EAI_FAIL, ...) says nothing about the name and must not be reported or cached as NXDOMAIN
+NEGATIVE_ANSWERS = frozenset(code for code in (getattr(socket, 'EAI_NONAME', None),
+                                               getattr(socket, 'EAI_NODATA', None))
+                             if code is not None)
+
+
+def lookup_addresses(name):
+    """
+    Resolve a hostname with the system resolver
+    Returns: frozenset of IP address strings (empty if the name doesn't resolve)
+    Raises: asyncio.TimeoutError when the resolver fails temporarily (e.g. EAI_AGAIN under load)
+    """
+    try:
+        infos = socket.getaddrinfo(name, None, type=socket.SOCK_STREAM)
+    except socket.gaierror as e:
+        if e.errno in NEGATIVE_ANSWERS:
+            return frozenset()
+        raise asyncio.TimeoutError(f"DNS lookup failed for {name}: {e.strerror}") from e
+    except (socket.herror, UnicodeError):
+        return frozenset()
+    return frozenset(info[4][0] for info in infos)
+
+
+def random_label(length=12):
+    """Generate a label that is very unlikely to exist in any zone"""
+    return ''.join(random.choices(string.ascii_lowercase + string.digits, k=length))
+
+
+class Resolver:
+    """
+    Concurrent resolver with wildcard detection
+
+    getaddrinfo blocks, so lookups run on a dedicated thread pool sized
+    for DNS instead of sharing the event loop's small default executor.
+    `resolve_func` can be swapped out (e.g. for an offline stand-in).
+    Answers (including "doesn't resolve") are kept in `cache` when given.
+    Lookups that go out wait on `limiter` (a RateLimiter) when given.
+    """
+
+    def __init__(self, threads=DEFAULT_DNS_THREADS, resolve_func=None, cache=None, limiter=None):
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix='resolver')
+        self.resolve_func = resolve_func or lookup_addresses
+        self.cache = cache
+        self.limiter = limiter
+        self.wildcard_addresses = frozenset()
+        self.stats = {'resolved': 0, 'unresolved': 0, 'wildcard': 0}
+
+    async def resolve(self, name, timeout=None, deadline=None):
+        """
+        Resolve one name without blocking the event loop
+        With a timing.Deadline in `deadline` the lookup gets what is left of it instead of `timeout`
+        Returns: frozenset of addresses
+        Raises: asyncio.TimeoutError if the lookup outlives `timeout` or the resolver fails temporarily
+        """
+        if self.limiter:
+            await self.limiter.acquire()
+        loop = asyncio.get_running_loop()
+        lookup = loop.run_in_executor(self.executor, self._timed_lookup, name, time.monotonic())
+        PROBES.labels(kind='dns').inc()
+        inflight = INFLIGHT.labels(kind='dns')
+        inflight.inc()
+        try:
+            if deadline is not None:
+                addresses = await deadline.run(lookup)
+            else:
+                addresses = await asyncio.wait_for(lookup, timeout)
+        except asyncio.TimeoutError:
+            TIMEOUTS.labels(kind='dns').inc()
+            if self.limiter:
+                self.limiter.failure()
+            raise
+        finally:
+            inflight.dec()
+        if self.limiter:
+            self.limiter.success()
+        return addresses
+
+    def _timed_lookup(self, name, submitted):
+        # Runs on a resolver thread: time spent queued for a thread vs in the lookup itself
+        start = time.monotonic()
+        DNS_QUEUE_SECONDS.observe(start - submitted)
+        try:
+            return self.resolve_func(name)
+        finally:
+            PROBE_SECONDS.labels(kind='dns').observe(time.monotonic() - start)
+
+    async def detect_wildcard(self, domain, probes=WILDCARD_PROBES, timeout=None):
+        """
+        Resolve random labels under domain; anything they resolve to is a wildcard answer
+        Returns: frozenset of wildcard addresses (empty if the zone has no wildcard)
+        """
+        names = [f"{random_label()}.{domain}" for _ in range(probes)]
+        answers = await asyncio.gather(*(self.resolve(name, timeout) for name in names),
+                                       return_exceptions=True)
+
+        addresses = set()
+        for answer in answers:
+            if isinstance(answer, frozenset):
+                addresses |= answer
+
+        self.wildcard_addresses = frozenset(addresses)
+        return self.wildcard_addresses
+
+    def is_wildcard(self, addresses):
+        """True if every address for a name is one the wildcard record also returns"""
+        return bool(self.wildcard_addresses) and addresses <= self.wildcard_addresses
+
+    async def filter(self, name, timeout=None, deadline=None):
+        """
+        Resolve a name and decide whether it deserves an HTTP probe
+        Returns: frozenset of addresses, or None if the name is unresolved or wildcard-only
+        """
+        cached = self.cache.get(name, 'dns') if self.cache is not None else MISS
+        if cached is MISS:
+            addresses = await self.resolve(name, timeout, deadline)
+            if self.cache is not None:
+                self.cache.put(name, 'dns', sorted(addresses))
+        else:
+            addresses = frozenset(cached)
+
+        if not addresses:
+            self.stats['unresolved'] += 1
+            return None
+        if self.is_wildcard(addresses):
+            self.stats['wildcard'] += 1
+            return None
+
+        self.stats['resolved'] += 1
+        return addresses
+
+    def close(self):
+        """Release resolver threads (lookups still blocked in getaddrinfo are abandoned)"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,101 @@
+"""
+Streaming NDJSON result sink
+Appends one JSON record per finding as it is discovered, so results are
+on disk (and visible to anything tailing the file) within seconds
+instead of only after the run completes
+"""
+
+import json
+import os
+import threading
+import time
+
+
+DEFAULT_FLUSH_INTERVAL = 1.0    # seconds a finding may sit in the buffer
+DEFAULT_FSYNC_INTERVAL = 5.0    # seconds between fsyncs
+DEFAULT_BATCH_SIZE = 256        # records that trigger an immediate write
+
+
+class NdjsonSink:
+    """
+    Buffered, append-only NDJSON writer
+
+    Records are written in batches: as soon as `batch_size` are buffered,
+    or at most `flush_interval` seconds after the first one arrived (a
+    background thread handles quiet periods). Each batch is a single
+    O_APPEND write, so several processes can share one file without
+    interleaving lines. The file is fsynced at most every `fsync_interval`
+    seconds and on close.
+    """
+
+    def __init__(self, path, append=False, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 fsync_interval=DEFAULT_FSYNC_INTERVAL, batch_size=DEFAULT_BATCH_SIZE):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.batch_size = batch_size
+        flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND | (0 if append else os.O_TRUNC)
+        self.fd = os.open(path, flags, 0o644)
+        self.stats = {'records': 0, 'writes': 0, 'fsyncs': 0}
+
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._last_fsync = time.monotonic()
+        self._dirty = False
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+        self._flusher.start()
+
+    def write(self, record):
+        """Queue one record (a JSON-serialisable dict)"""
+        line = json.dumps(record, separators=(',', ':'), default=str) + "\n"
+        with self._lock:
+            self._buffer.append(line)
+            self.stats['records'] += 1
+            if len(self._buffer) >= self.batch_size:
+                self._write_batch()
+
+    def subdomain(self, name):
+        self.write({'type': 'subdomain', 'name': name, 'time': time.time()})
+
+    def port(self, target, port, service):
+        self.write({'type': 'port', 'target': target, 'port': port, 'service': service,
+                    'time': time.time()})
+
+    def _write_batch(self):
+        # Caller holds the lock
+        if self._buffer:
+            os.write(self.fd, ''.join(self._buffer).encode('utf-8'))
+            self._buffer = []
+            self.stats['writes'] += 1
+            self._dirty = True
+        if self._dirty and time.monotonic() - self._last_fsync >= self.fsync_interval:
+            self._fsync()
+
+    def _fsync(self):
+        os.fsync(self.fd)
+        self._last_fsync = time.monotonic()
+        self._dirty = False
+        self.stats['fsyncs'] += 1
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_interval):
+            with self._lock:
+                self._write_batch()
+
+    def flush(self):
+        """Write everything buffered so far"""
+        with self._lock:
+            self._write_batch()
+
+    def close(self):
+        """Write and fsync anything outstanding, then close the file"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._flusher.join()
+        with self._lock:
+            self._write_batch()
+            if self._dirty:
+                self._fsync()
+            os.close(self.fd)
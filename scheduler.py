@@ -0,0 +1,226 @@
+"""
+Cross-target connect-scan scheduler
+Interleaves (host, port) probes from every target into one global
+concurrency budget, with a per-host cap so no single host gets flooded
+"""
+
+import asyncio
+import socket
+import struct
+import time
+from collections import deque
+
+from port_spec import OpenPorts, PortSet, service_name
+from metrics import PROBES, TIMEOUTS, ERRORS, PROBE_SECONDS, INFLIGHT, CONNECT_RESULTS
+from timing import RttEstimator, DEFAULT_MIN_TIMEOUT, DEFAULT_RETRIES
+
+
+DEFAULT_PORT_CONCURRENCY = 1000  # connects in flight across all targets
+DEFAULT_PER_HOST_CONCURRENCY = 100  # connects in flight against any one target
+DEFAULT_CONNECT_TIMEOUT = 2      # seconds; initial and maximum per-connect timeout
+
+# Connect outcomes
+PORT_OPEN = 'open'
+PORT_CLOSED = 'closed'
+PORT_FILTERED = 'filtered'
+PORT_ERROR = 'error'
+
+
+async def connect_port(loop, family, address, port, timeout, banners=None):
+    """
+    Attempt one non-blocking TCP connect
+    With a BannerGrabber in `banners`, open ports are identified on the
+    same connection before it is closed.
+    Returns: (state, seconds taken, service) - state is PORT_OPEN, PORT_CLOSED
+    (refused), PORT_FILTERED (no answer before the timeout) or PORT_ERROR;
+    service is the identified service name, or None
+    """
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setblocking(False)
+    # Close with RST so full sweeps don't pile up sockets in TIME_WAIT
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+    PROBES.labels(kind='connect').inc()
+    inflight = INFLIGHT.labels(kind='connect')
+    inflight.inc()
+    start = time.monotonic()
+    service = None
+    try:
+        await asyncio.wait_for(loop.sock_connect(sock, (address, port)), timeout)
+        state = PORT_OPEN
+        elapsed = time.monotonic() - start
+        if banners is not None:
+            service = await banners.identify(loop, sock)
+    except ConnectionRefusedError:
+        state = PORT_CLOSED
+    except asyncio.TimeoutError:
+        state = PORT_FILTERED
+        TIMEOUTS.labels(kind='connect').inc()
+    except OSError as e:
+        state = PORT_ERROR
+        ERRORS.labels(kind='connect', error=type(e).__name__).inc()
+    finally:
+        sock.close()
+        inflight.dec()
+    if state != PORT_OPEN:
+        elapsed = time.monotonic() - start
+    PROBE_SECONDS.labels(kind='connect').observe(elapsed)
+    CONNECT_RESULTS.labels(state=state).inc()
+    return state, elapsed, service
+
+
+class HostState:
+    """Scan progress for one target"""
+
+    __slots__ = ('target', 'family', 'address', 'ports', 'open_ports', 'closed_ports', 'rtt',
+                 'inflight', 'exhausted')
+
+    def __init__(self, target, ports, rtt):
+        self.target = target
+        self.family = None
+        self.address = None
+        self.ports = iter(ports)
+        self.open_ports = OpenPorts()
+        self.closed_ports = PortSet()   # ports that refused the connection
+        self.rtt = rtt
+        self.inflight = 0
+        self.exhausted = False
+
+
+class ScanScheduler:
+    """
+    Round-robin dispatcher over all targets
+
+    Each turn takes the next port from the next host that is below its
+    per-host cap, until `concurrency` connects are in flight. A host that
+    hits its cap leaves the rotation and rejoins as soon as one of its
+    connects finishes, so a slow host never holds up the others.
+    Only in-flight probes exist as tasks; memory doesn't grow with the
+    number of ports or targets still queued.
+    """
+
+    def __init__(self, concurrency=DEFAULT_PORT_CONCURRENCY, per_host=DEFAULT_PER_HOST_CONCURRENCY,
+                 timeout=DEFAULT_CONNECT_TIMEOUT, min_timeout=DEFAULT_MIN_TIMEOUT,
+                 retries=DEFAULT_RETRIES, on_port_done=None, on_host_done=None, banners=None,
+                 limiter=None, log=None):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.min_timeout = min_timeout
+        self.retries = retries
+        self.on_port_done = on_port_done    # (target, port, service or None, PORT_* state)
+        self.on_host_done = on_host_done    # (target, OpenPorts, RttEstimator, PortSet closed)
+        self.banners = banners              # BannerGrabber for open ports, or None
+        self.limiter = limiter              # RateLimiter every connect attempt waits on, or None
+        self.log = log                      # (message) for unresolvable targets and errors, or None
+
+    async def _resolve(self, loop, host):
+        try:
+            infos = await loop.getaddrinfo(host.target, None, type=socket.SOCK_STREAM)
+        except (socket.gaierror, UnicodeError) as e:
+            if self.log:
+                self.log(f"[!] Cannot resolve {host.target}: {e}")
+            return False
+        host.family, _, _, _, sockaddr = infos[0]
+        host.address = sockaddr[0]
+        return True
+
+    def _finish(self, host):
+        if self.on_host_done:
+            self.on_host_done(host.target, host.open_ports, host.rtt, host.closed_ports)
+
+    async def _probe(self, loop, host, port):
+        rtt = host.rtt
+        limiter = self.limiter
+        for attempt in range(self.retries + 1):
+            if limiter:
+                await limiter.acquire()
+            state, elapsed, service = await connect_port(loop, host.family, host.address, port,
+                                                         rtt.retry_timeout(attempt), self.banners)
+            # SYN-ACKs and RSTs both measure a full round trip
+            if state in (PORT_OPEN, PORT_CLOSED):
+                rtt.sample(elapsed)
+            if state != PORT_FILTERED:
+                break
+        
+        if limiter:
+            # Congestion shows up as attempts that timed out on a port that did answer in
+            # the end, or as local errors; a port that never answers is just filtered
+            if state == PORT_ERROR:
+                limiter.failure()
+            elif state != PORT_FILTERED:
+                if attempt:
+                    limiter.failure(attempt)
+                else:
+                    limiter.success()
+
+        if state == PORT_OPEN:
+            # A recognised banner beats the port's registered name
+            service = service or service_name(port)
+            host.open_ports[port] = service
+        elif state == PORT_CLOSED:
+            host.closed_ports.add(port)
+        if self.on_port_done:
+            self.on_port_done(host.target, port, service, state)
+
+    async def run(self, jobs):
+        """
+        Scan every (target, ports) job; results stream out through the callbacks
+        Returns: {target: OpenPorts}
+        """
+        loop = asyncio.get_running_loop()
+        hosts = [HostState(target, ports, RttEstimator(self.timeout, self.min_timeout))
+                 for target, ports in jobs]
+        resolved = await asyncio.gather(*(self._resolve(loop, host) for host in hosts))
+
+        ready = deque()
+        for host, ok in zip(hosts, resolved):
+            if ok:
+                ready.append(host)
+            else:
+                self._finish(host)
+
+        wake = asyncio.Event()
+        inflight = 0
+        tasks = set()  # the event loop only keeps weak references to tasks
+
+        async def probe(host, port):
+            nonlocal inflight
+            try:
+                await self._probe(loop, host, port)
+            except Exception as e:
+                if self.log:
+                    self.log(f"[!] Error scanning {host.target}:{port}: {e}")
+            finally:
+                inflight -= 1
+                host.inflight -= 1
+                if host.exhausted:
+                    if host.inflight == 0:
+                        self._finish(host)
+                elif host.inflight == self.per_host - 1:
+                    ready.append(host)  # was at its cap; back into the rotation
+                wake.set()
+
+        while True:
+            while ready and inflight < self.concurrency:
+                host = ready.popleft()
+                port = next(host.ports, None)
+                if port is None:
+                    host.exhausted = True
+                    if host.inflight == 0:
+                        self._finish(host)
+                    continue
+
+                host.inflight += 1
+                inflight += 1
+                task = loop.create_task(probe(host, port))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                if host.inflight < self.per_host:
+                    ready.append(host)
+
+            if inflight == 0 and not ready:
+                break
+            wake.clear()
+            await wake.wait()
+
+        return {host.target: host.open_ports for host in hosts}
@@ -0,0 +1,105 @@
+"""
+Sharded execution for recon runs
+Splits wordlists and (target, port) work deterministically so separate
+processes or machines can each take a slice of one job, and merges the
+per-shard results back into a single report
+"""
+
+import zlib
+
+from port_spec import OpenPorts, PortSet
+
+
+def parse_shard(spec):
+    """
+    Parse "i/N" (0 <= i < N)
+    Returns: (index, count)
+    Raises: ValueError for anything else
+    """
+    index, sep, count = spec.partition('/')
+    if not sep or not index.strip().isdigit() or not count.strip().isdigit():
+        raise ValueError(f"Bad shard '{spec}' (expected i/N, e.g. 0/4)")
+    index, count = int(index), int(count)
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Shard '{spec}' is out of range (need 0 <= i < N)")
+    return index, count
+
+
+def split_shard(shard, workers):
+    """
+    Divide one shard between local worker processes
+    Worker k of shard i/N becomes shard (i + N*k)/(N*K), so the workers
+    together cover exactly the keys shard i/N owns.
+    """
+    index, count = shard or (0, 1)
+    return [(index + count * k, count * workers) for k in range(workers)]
+
+
+def in_shard(key, shard):
+    """True if this shard owns `key` (stable across processes, machines and Python versions)"""
+    if shard is None:
+        return True
+    index, count = shard
+    return zlib.crc32(key.encode('utf-8')) % count == index
+
+
+def shard_ports(ports, shard):
+    """The slice of a port set this shard scans (every port goes to exactly one shard)"""
+    if shard is None:
+        return ports
+    index, count = shard
+    return PortSet(port for port in ports if port % count == index)
+
+
+def merge_results(parts):
+    """
+    Combine per-shard results dicts into one
+    Returns: {'subdomains': [...], 'ports': {target: OpenPorts}}, plus the
+    concatenated 'changes' when the shards ran against a baseline
+    """
+    merged = {'subdomains': [], 'ports': {}}
+    seen = set()
+    for part in parts:
+        for subdomain in part.get('subdomains', []):
+            if subdomain not in seen:
+                seen.add(subdomain)
+                merged['subdomains'].append(subdomain)
+        for target, ports in part.get('ports', {}).items():
+            combined = merged['ports'].setdefault(target, OpenPorts())
+            for port, service in ports.items():
+                combined[port] = service
+        for representative, members in part.get('clusters', {}).items():
+            merged.setdefault('clusters', {}).setdefault(representative, []).extend(members)
+        if 'changes' in part:
+            merged.setdefault('changes', []).extend(part['changes'])
+        if 'banners' in part:
+            merged['banners'] = part['banners']
+    return merged
+
+
+class PrefixedOutput:
+    """
+    stdout wrapper that tags each line with the worker it came from
+    Whole lines are written (and flushed) at once so output from
+    concurrent workers interleaves by line, not mid-line.
+    """
+
+    def __init__(self, stream, prefix):
+        self.stream = stream
+        self.prefix = prefix
+        self.partial = ''
+
+    def write(self, text):
+        lines = (self.partial + text).split('\n')
+        self.partial = lines.pop()
+        if lines:
+            self.stream.write(''.join(f"{self.prefix}{line}\n" if line.strip() else "\n"
+                                      for line in lines))
+            self.stream.flush()
+        return len(text)
+
+    def flush(self):
+        if self.partial:
+            self.stream.write(self.prefix + self.partial)
+            self.partial = ''
+        self.stream.flush()
@@ -0,0 +1,89 @@
+"""
+Adaptive per-host timing for connect scans
+Derives connect timeouts from measured round-trip times the way TCP
+computes its retransmission timeout (RFC 6298), plus the deadline that
+bounds each subdomain probe
+"""
+
+import asyncio
+import time
+
+DEFAULT_MIN_TIMEOUT = 0.1   # seconds; floor so jitter on fast LANs doesn't cause false "filtered"
+DEFAULT_RETRIES = 1         # extra attempts for connects that time out
+CLOCK_GRANULARITY = 0.01    # G in RFC 6298
+ALPHA = 1 / 8               # SRTT gain
+BETA = 1 / 4                # RTTVAR gain
+K = 4                       # RTTVAR multiplier
+
+
+class RttEstimator:
+    """
+    Smoothed RTT / RTT variance for one host
+
+    Fed with the time a connect took to complete (SYN-ACK) or be refused (RST).
+    Until the first sample arrives the initial timeout is used; afterwards
+        timeout = SRTT + max(G, K * RTTVAR)
+    clamped to [min_timeout, max_timeout].
+    """
+
+    __slots__ = ('initial', 'min_timeout', 'max_timeout', 'srtt', 'rttvar', 'samples')
+
+    def __init__(self, initial_timeout, min_timeout=DEFAULT_MIN_TIMEOUT, max_timeout=None):
+        self.initial = initial_timeout
+        self.min_timeout = min(min_timeout, initial_timeout)
+        self.max_timeout = initial_timeout if max_timeout is None else max_timeout
+        self.srtt = None
+        self.rttvar = None
+        self.samples = 0
+
+    def sample(self, rtt):
+        """Record one measured round trip (seconds)"""
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - BETA) * self.rttvar + BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - ALPHA) * self.srtt + ALPHA * rtt
+        self.samples += 1
+
+    @property
+    def timeout(self):
+        """Current connect timeout for this host"""
+        if self.srtt is None:
+            return self.initial
+        rto = self.srtt + max(CLOCK_GRANULARITY, K * self.rttvar)
+        return min(self.max_timeout, max(self.min_timeout, rto))
+
+    def retry_timeout(self, attempt):
+        """Timeout for retry number `attempt` (exponential backoff, like TCP)"""
+        return min(self.max_timeout, self.timeout * (2 ** attempt))
+
+    def __repr__(self):
+        if self.srtt is None:
+            return f"<RttEstimator no samples, timeout={self.initial:.3f}s>"
+        return (f"<RttEstimator srtt={self.srtt * 1000:.1f}ms rttvar={self.rttvar * 1000:.1f}ms "
+                f"timeout={self.timeout * 1000:.0f}ms>")
+
+
+class Deadline:
+    """
+    One time budget shared by the stages of a probe (DNS, then HTTP)
+    Only time spent inside a stage is charged; waits on a rate limiter
+    between stages are not, so pacing doesn't turn into timeouts.
+    """
+
+    __slots__ = ('remaining',)
+
+    def __init__(self, seconds):
+        self.remaining = seconds
+
+    async def run(self, awaitable):
+        """
+        Await one stage within what is left of the budget
+        Raises: asyncio.TimeoutError if the budget runs out first
+        """
+        start = time.monotonic()
+        try:
+            return await asyncio.wait_for(awaitable, max(self.remaining, 0))
+        finally:
+            self.remaining -= time.monotonic() - start
@@ -0,0 +1,142 @@
+"""
+Streaming wordlist loader
+Yields normalized, deduplicated labels straight from (optionally compressed)
+wordlist files so probing can start before the whole list has been read
+"""
+
+import hashlib
+import importlib
+import io
+import math
+import os
+import re
+
+
+DEFAULT_DEDUP_ERROR_RATE = 0.0001  # chance a new label is mistaken for a duplicate
+MIN_DEDUP_CAPACITY = 100_000
+
+# Magic bytes -> module whose open() reads the compressed wordlist
+# (imported only when such a file turns up)
+COMPRESSED_FORMATS = [
+    (b'\x1f\x8b', 'gzip'),
+    (b'\xfd7zXZ\x00', 'lzma'),
+    (b'BZh', 'bz2'),
+]
+
+VALID_LABEL = re.compile(r'^[a-z0-9_](?:[a-z0-9_.-]*[a-z0-9_])?$')
+
+
+class BloomFilter:
+    """
+    Fixed-size set membership test for deduplicating huge wordlists
+    Memory is allocated once from `capacity` and `error_rate` and never grows;
+    the trade-off is that roughly `error_rate` of new items are reported as seen.
+    """
+
+    def __init__(self, capacity, error_rate=DEFAULT_DEDUP_ERROR_RATE):
+        capacity = max(1, int(capacity))
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = min(16, max(1, round(self.size / capacity * math.log(2))))
+        self.digest_size = 4 * self.hashes
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        # One digest sliced into k independent 32-bit positions
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=self.digest_size).digest()
+        size = self.size
+        return [word % size for word in memoryview(digest).cast('I')]
+
+    def add(self, item):
+        """
+        Insert item
+        Returns: True if it was new, False if it was (probably) already present
+        """
+        bits = self.bits
+        new = False
+        for pos in self._positions(item):
+            mask = 1 << (pos & 7)
+            if not bits[pos >> 3] & mask:
+                bits[pos >> 3] |= mask
+                new = True
+        return new
+
+    def __contains__(self, item):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+def open_wordlist(path):
+    """
+    Open a plain, gzip, xz or bzip2 wordlist as text (compression is detected from content)
+    Raises: FileNotFoundError if the file doesn't exist
+    """
+    with open(path, 'rb') as f:
+        magic = f.read(6)
+
+    for signature, module in COMPRESSED_FORMATS:
+        if magic.startswith(signature):
+            opener = importlib.import_module(module).open
+            return io.TextIOWrapper(opener(path, 'rb'), encoding='utf-8', errors='replace')
+    return open(path, 'r', encoding='utf-8', errors='replace')
+
+
+def estimate_capacity(path):
+    """Guess how many lines a wordlist holds from its size on disk"""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        magic = f.read(6)
+    if any(magic.startswith(signature) for signature, _ in COMPRESSED_FORMATS):
+        size *= 4  # typical text compression ratio
+    return max(MIN_DEDUP_CAPACITY, size // 6)  # ~6 bytes per short label + newline
+
+
+def normalize_label(line):
+    """
+    Clean one wordlist line into a lowercase label
+    Returns: the label, or None for blanks, comments and invalid entries
+    """
+    label = line.strip().lower().strip('.')
+    if not label or label.startswith('#') or len(label) > 253:
+        return None
+    if not VALID_LABEL.match(label):
+        return None
+    return label
+
+
+class WordlistStream:
+    """
+    Iterate unique, normalized labels from a wordlist file or any iterable of lines
+    The file is opened immediately (so a bad path fails fast) but read lazily.
+    """
+
+    def __init__(self, source, capacity=None, error_rate=DEFAULT_DEDUP_ERROR_RATE):
+        if isinstance(source, (str, os.PathLike)):
+            if capacity is None:
+                capacity = estimate_capacity(source)
+            self.lines = open_wordlist(source)
+        else:
+            if capacity is None:
+                capacity = len(source) if hasattr(source, '__len__') else MIN_DEDUP_CAPACITY
+            self.lines = source
+        self.seen = BloomFilter(max(capacity, 1), error_rate)
+        self.stats = {'lines': 0, 'unique': 0, 'duplicates': 0, 'skipped': 0}
+
+    def __iter__(self):
+        stats = self.stats
+        try:
+            for line in self.lines:
+                stats['lines'] += 1
+                label = normalize_label(line)
+                if label is None:
+                    stats['skipped'] += 1
+                elif not self.seen.add(label):
+                    stats['duplicates'] += 1
+                else:
+                    stats['unique'] += 1
+                    yield label
+        finally:
+            self.close()
+
+    def close(self):
+        if hasattr(self.lines, 'close'):
+            self.lines.close()